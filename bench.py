@@ -0,0 +1,428 @@
+"""
+Benchmark di avvio, DB, tabella risultati, export e WHZ.
+
+    python bench.py                      # tutto, fino a 100k righe
+    python bench.py --quick              # dimensioni ridotte (fino a 10k)
+    python bench.py --only whz_batch list_registry
+    python bench.py --compare 1.0.12     # confronta con i risultati di un'altra versione
+    python bench.py --only commits --dir /media/chiavetta   # DB sulla chiavetta USB
+
+I risultati finiscono in bench_results.json (locale, ignorato da git), una voce
+per versione (version.py): rilanciando con la stessa versione i benchmark
+eseguiti vengono sostituiti.
+I tempi sono in millisecondi (chiavi *_ms), il migliore su più ripetizioni.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import db
+from synthetic import generate_db, synthetic_rows
+from version import __version__
+
+HERE = Path(__file__).resolve().parent
+RESULTS_FILE = HERE / "bench_results.json"
+
+SIZES = (1_000, 10_000, 100_000)
+QUICK_SIZES = (1_000, 10_000)
+REPEAT = 5
+COMMITS = 300   # salvataggi singoli per modalità in bench_commits
+COMMIT_GROUP = 8
+
+_IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import main
+seconds = time.perf_counter() - t
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss //= 1024   # su macOS ru_maxrss è in byte
+except ImportError:
+    rss = None
+print(json.dumps({"seconds": seconds, "modules": len(sys.modules), "maxrss_kb": rss}))
+"""
+
+
+def _best_ms(fn, repeat: int = REPEAT, setup=None) -> dict:
+    """Esegue fn() `repeat` volte (con setup() prima di ognuna, fuori dal tempo)."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return {"best_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3)}
+
+
+def _peak_kb(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+class Context:
+    """Cartella temporanea e DB sintetici condivisi tra i benchmark."""
+    def __init__(self, sizes, base_dir=None):
+        self.sizes = sizes
+        # base_dir: per misurare il disco vero (es. una chiavetta) invece di /tmp
+        self.tmp = Path(tempfile.mkdtemp(prefix="bench_", dir=base_dir))
+        self._dbs = {}
+        self._n = 0
+
+    def new_path(self, name: str = "db") -> Path:
+        self._n += 1
+        return self.tmp / f"{name}_{self._n}.sqlite3"
+
+    def db_with(self, rows: int) -> Path:
+        """DB allo schema corrente con `rows` righe sintetiche (creato una volta sola)."""
+        if rows not in self._dbs:
+            path = self.tmp / f"registry_{rows}.sqlite3"
+            generate_db(path, rows)
+            db.close_all()
+            self._dbs[rows] = path
+        db.use_db(self._dbs[rows])
+        return self._dbs[rows]
+
+    def cleanup(self):
+        db.close_all()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+# ---------- benchmark ----------
+
+def bench_import_main(ctx: Context) -> dict:
+    """Import di main in un processo nuovo (ogni volta a freddo per Python, non per il disco)."""
+    runs = []
+    for _ in range(REPEAT):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE], cwd=HERE, capture_output=True, text=True,
+            env={**os.environ, "QT_QPA_PLATFORM": "offscreen"},
+        )
+        if out.returncode != 0:
+            return {"skipped": out.stderr.strip().splitlines()[-1] if out.stderr else "errore"}
+        runs.append(json.loads(out.stdout))
+    times = [r["seconds"] * 1000 for r in runs]
+    return {
+        "best_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "modules": runs[0]["modules"],
+        "maxrss_kb": runs[0]["maxrss_kb"],
+    }
+
+
+def bench_init_db(ctx: Context) -> dict:
+    result = {}
+
+    def fresh():
+        db.use_db(ctx.new_path("empty"))
+
+    def run():
+        db.init_db()
+        db.close_all()
+
+    result["empty"] = _best_ms(run, setup=fresh)
+
+    for rows in ctx.sizes:
+        ctx.db_with(rows)
+        # schema già aggiornato: il costo che si paga a ogni avvio
+        result[f"current_{rows}"] = _best_ms(run)
+    return result
+
+
+def bench_migrate(ctx: Context) -> dict:
+    """init_db su un DB v1 (senza q6, senza indici né trigger) con le righe già dentro."""
+    result = {}
+    v1_columns = ", ".join(c for c in db.REGISTRY_COLUMNS if c != "q6")
+
+    for rows in ctx.sizes:
+        source = ctx.db_with(rows)
+        db.close_all()
+
+        def make_v1():
+            path = ctx.new_path("v1")
+            conn = sqlite3.connect(path)
+            conn.execute(db.REGISTRY_V1_DDL)
+            conn.execute("ATTACH DATABASE ? AS src", (str(source),))
+            with conn:
+                conn.execute(f"INSERT INTO registry ({v1_columns}) SELECT {v1_columns} FROM src.registry")
+            conn.execute("DETACH DATABASE src")
+            conn.close()
+            db.use_db(path)
+
+        def run():
+            db.init_db()
+            db.close_all()
+
+        result[f"v1_{rows}"] = _best_ms(run, repeat=3, setup=make_v1)
+    return result
+
+
+def bench_list_registry(ctx: Context) -> dict:
+    result = {}
+    for rows in ctx.sizes:
+        ctx.db_with(rows)
+        result[f"all_{rows}"] = _best_ms(lambda: db.list_registry())
+        result[f"all_{rows}"]["peak_kb"] = _peak_kb(lambda: db.list_registry())
+        result[f"search_{rows}"] = _best_ms(lambda: db.list_registry("SYN0000"))
+        result[f"first_page_{rows}"] = _best_ms(lambda: db.list_registry_page())
+        result[f"count_{rows}"] = _best_ms(lambda: db.count_registry(village="Befandefa"))
+        db.close_all()
+    return result
+
+
+def bench_results_fill(ctx: Context) -> dict:
+    """ResultsTab._fill con la prima pagina, sulla piattaforma Qt 'offscreen'."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PySide6.QtWidgets import QApplication
+    except ImportError as e:
+        return {"skipped": str(e)}
+    from results_tab import RESULTS_PAGE_SIZE, ResultsTab
+
+    app = QApplication.instance() or QApplication([])
+    result = {}
+    for rows in ctx.sizes:
+        ctx.db_with(rows)
+        tab = ResultsTab()
+        page = db.list_registry_page(columns=db.RECORD_COLUMNS, page_size=RESULTS_PAGE_SIZE)
+        result[f"first_page_{rows}"] = _best_ms(lambda: tab._fill({}, page))
+        tab.shutdown()
+        tab.deleteLater()
+        app.processEvents()
+        db.close_all()
+    return result
+
+
+def bench_export_csv(ctx: Context) -> dict:
+    from export_utils import export_rows_to_csv
+
+    rows_count = ctx.sizes[-1]
+    ctx.db_with(rows_count)
+    rows = db.list_registry()
+    out = ctx.tmp / "export.csv"
+    result = _best_ms(lambda: export_rows_to_csv(rows, str(out)), repeat=3)
+    result["rows"] = rows_count
+    result["rows_per_sec"] = round(rows_count / (result["best_ms"] / 1000))
+    result["bytes"] = out.stat().st_size
+    db.close_all()
+    return result
+
+
+def _whz_inputs(n: int):
+    rows = list(synthetic_rows(n, seed=1))
+    # weight, height, gender, declared_age
+    return [r[8] for r in rows], [r[9] for r in rows], [r[6] for r in rows], [r[4] for r in rows]
+
+
+def bench_whz_single(ctx: Context) -> dict:
+    from whz import whz_for
+
+    n = 10_000
+    weights, heights, sexes, ages = _whz_inputs(n)
+
+    def run():
+        for w, h, s, a in zip(weights, heights, sexes, ages):
+            whz_for(w, h, s, a)
+
+    result = _best_ms(run)
+    result["calls"] = n
+    result["us_per_call"] = round(result["best_ms"] * 1000 / n, 3)
+    return result
+
+
+def bench_whz_batch(ctx: Context) -> dict:
+    from whz import compute_whz_batch
+
+    n = ctx.sizes[-1]
+    weights, heights, sexes, ages = _whz_inputs(n)
+    result = {"rows": n}
+    result["python"] = _best_ms(lambda: compute_whz_batch(weights, heights, sexes, ages, use_numpy=False), repeat=3)
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        result["numpy"] = {"skipped": "numpy non installato"}
+    else:
+        result["numpy"] = _best_ms(lambda: compute_whz_batch(weights, heights, sexes, ages, use_numpy=True))
+    return result
+
+
+# journal e sincronizzazione: i default di SQLite (come era l'app prima del WAL)
+# e quelli di db.CONNECTION_PRAGMAS
+COMMIT_MODES = {
+    "rollback_full": ("DELETE", "FULL"),
+    "wal_normal": ("WAL", "NORMAL"),
+}
+
+
+def bench_commits(ctx: Context) -> dict:
+    """
+    Compilazioni salvate una alla volta (una transazione ciascuna, come FormTab),
+    in commit al secondo. Il numero che conta è quello sul disco vero: --dir.
+    wal_normal_checkpointer aggiunge il thread di checkpoint dell'app,
+    wal_normal_group_* salva a gruppi come il thread di scrittura (db.apply_writes).
+    """
+    rows = [dict(zip(db.REGISTRY_COLUMNS, r)) for r in synthetic_rows(COMMITS, seed=2)]
+    result = {"commits": COMMITS, "dir": str(ctx.tmp.parent)}
+
+    for name, checkpointer in [(m, False) for m in COMMIT_MODES] + [("wal_normal_checkpointer", True)]:
+        journal, sync = COMMIT_MODES.get(name, COMMIT_MODES["wal_normal"])
+        db.use_db(ctx.new_path("commits"))
+        db.init_db()
+        conn = db.get_conn()
+        conn.execute(f"PRAGMA journal_mode = {journal}")
+        conn.execute(f"PRAGMA synchronous = {sync}")
+        if checkpointer:
+            db.start_checkpointer(interval=0.05)
+        try:
+            t = time.perf_counter()
+            for r in rows:
+                db.insert_registry(r)
+            seconds = time.perf_counter() - t
+        finally:
+            db.stop_checkpointer()
+            db.close_all()
+        result[name] = {
+            "best_ms": round(seconds * 1000, 3),
+            "commits_per_sec": round(COMMITS / seconds, 1),
+        }
+
+    # group commit del thread di scrittura (write_queue): GROUP righe per commit
+    db.use_db(ctx.new_path("commits"))
+    db.init_db()
+    writes = [("insert", r["taratassi"], r) for r in rows]
+    t = time.perf_counter()
+    for i in range(0, COMMITS, COMMIT_GROUP):
+        db.apply_writes(writes[i:i + COMMIT_GROUP])
+    seconds = time.perf_counter() - t
+    db.close_all()
+    result[f"wal_normal_group_{COMMIT_GROUP}"] = {
+        "best_ms": round(seconds * 1000, 3),
+        "saves_per_sec": round(COMMITS / seconds, 1),
+    }
+    return result
+
+
+BENCHMARKS = {
+    "import_main": bench_import_main,
+    "init_db": bench_init_db,
+    "migrate": bench_migrate,
+    "list_registry": bench_list_registry,
+    "results_fill": bench_results_fill,
+    "export_csv": bench_export_csv,
+    "whz_single": bench_whz_single,
+    "whz_batch": bench_whz_batch,
+    "commits": bench_commits,
+}
+
+
+# ---------- risultati ----------
+
+def load_results(path: Path = RESULTS_FILE) -> dict:
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_results(entry: dict, path: Path = RESULTS_FILE) -> None:
+    data = load_results(path)
+    old = data.get(entry["version"])
+    if old:
+        # con --only si aggiornano solo i benchmark rieseguiti
+        entry = {**entry, "results": {**old["results"], **entry["results"]}}
+    data[entry["version"]] = entry
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _flatten(d: dict, prefix: str = "") -> dict:
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}{k}"
+        if isinstance(v, dict):
+            out.update(_flatten(v, key + "."))
+        else:
+            out[key] = v
+    return out
+
+
+def compare(old: dict, new: dict) -> None:
+    """Stampa i tempi best_ms di due esecuzioni affiancati, con il rapporto nuovo/vecchio."""
+    a = _flatten(old["results"])
+    b = _flatten(new["results"])
+    print(f"{'benchmark':<40} {old['version']:>12} {new['version']:>12}  rapporto")
+    for key in sorted(b):
+        if not key.endswith("best_ms") or key not in a:
+            continue
+        ratio = b[key] / a[key] if a[key] else float("inf")
+        flag = "  <-- più lento" if ratio > 1.2 else ""
+        print(f"{key[:-len('.best_ms')]:<40} {a[key]:>12.2f} {b[key]:>12.2f}  {ratio:6.2f}x{flag}")
+
+
+def run(names, sizes, base_dir=None) -> dict:
+    ctx = Context(sizes, base_dir)
+    results = {}
+    try:
+        for name in names:
+            print(f"[bench] {name}...", file=sys.stderr, flush=True)
+            t = time.perf_counter()
+            results[name] = BENCHMARKS[name](ctx)
+            print(f"[bench] {name}: {time.perf_counter() - t:.1f}s", file=sys.stderr)
+    finally:
+        ctx.cleanup()
+    return {
+        "version": __version__,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "sizes": list(sizes),
+        "results": results,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del questionario.")
+    parser.add_argument("--quick", action="store_true", help=f"dimensioni ridotte {QUICK_SIZES}")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), metavar="NOME")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true", help="non scrive il file dei risultati")
+    parser.add_argument("--compare", metavar="VERSIONE", help="confronta con i risultati salvati di VERSIONE")
+    parser.add_argument("--dir", type=Path, help="cartella dei DB di prova (default: la temporanea di sistema)")
+    args = parser.parse_args(argv)
+
+    previous = load_results(args.output)
+    if args.compare and args.compare not in previous:
+        print(f"Nessun risultato salvato per la versione {args.compare}", file=sys.stderr)
+        return 1
+
+    entry = run(args.only or list(BENCHMARKS), QUICK_SIZES if args.quick else SIZES, args.dir)
+    print(json.dumps(entry["results"], indent=2))
+    if not args.no_save:
+        save_results(entry, args.output)
+    if args.compare:
+        compare(previous[args.compare], entry)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
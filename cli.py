@@ -0,0 +1,364 @@
+"""
+Riga di comando per le operazioni batch, senza avviare (né importare) Qt.
+
+Esempi:
+    python cli.py init
+    python cli.py migrate --dry-run
+    python cli.py import dati_tablet2.csv
+    python cli.py export risultati.parquet --format parquet --village Befandefa
+    python cli.py export severi.csv --malnutrition severa
+    python cli.py export-changes delta.jsonl --after 1200
+    python cli.py merge laptop1.sqlite3 laptop2.sqlite3 --policy keep_both
+    python cli.py recompute-whz --dry-run
+    python cli.py stats
+    python cli.py rebuild-stats --check
+    python cli.py vacuum
+    python cli.py integrity-check
+    python cli.py generate prova.sqlite3 1000000
+
+Con --db si lavora su un file diverso da quello dell'app (data/questionario.sqlite3).
+"""
+import argparse
+import math
+import sqlite3
+import sys
+
+import db
+
+
+def cmd_init(args) -> int:
+    db.init_db()
+    from migrations import CURRENT_SCHEMA_VERSION
+    print(f"DB pronto (schema v{CURRENT_SCHEMA_VERSION}): {db.DB_PATH}")
+    return 0
+
+
+def cmd_migrate(args) -> int:
+    """Applica le migrazioni mancanti mostrando la durata di ognuna; con --dry-run su una copia."""
+    from migrations import CURRENT_SCHEMA_VERSION, get_db_version, preflight
+
+    conn = db.get_conn()
+    if args.dry_run:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'registry'").fetchone() is None:
+            print(f"DB nuovo, nessuna migrazione da provare: {db.DB_PATH}")
+            return 0
+        timings = preflight(conn, batch_size=args.batch_size, log=print)
+        total = sum(seconds for _, seconds in timings)
+        print(f"Prova su una copia: {len(timings)} migrazioni, {total:.2f}s; il DB non è stato modificato.")
+        return 0
+
+    db.init_db(batch_size=args.batch_size, log=print)
+    print(f"DB alla versione {get_db_version(conn)} (app: v{CURRENT_SCHEMA_VERSION}): {db.DB_PATH}")
+    return 0
+
+
+def cmd_import(args) -> int:
+    from import_utils import apply_changes_file, import_file
+
+    db.init_db()
+    status = 0
+    for path in args.files:
+        if args.changes:
+            report = apply_changes_file(path, lenient=args.lenient, batch_size=args.batch_size)
+        else:
+            report = import_file(path, replace=args.replace, lenient=args.lenient, batch_size=args.batch_size)
+        print(f"{path}: {report.summary()}")
+        for issue in report.conflicts + report.errors:
+            print(f"  riga {issue.line} [{issue.taratassi or '-'}]: {issue.message}")
+        if report.errors:
+            status = 1
+    return status
+
+
+# --malnutrition -> codici whz.CLASS_* salvati nella colonna malnutrition
+MALNUTRITION_CHOICES = {
+    "nessuna": (0,),
+    "moderata": (1,),
+    "severa": (2,),
+    "malnutriti": (1, 2),
+}
+
+
+def _filters(args) -> dict:
+    filters = {}
+    if args.village:
+        filters["village"] = args.village
+    if args.gender:
+        filters["gender"] = args.gender
+    if args.date_from:
+        filters["date_from"] = args.date_from
+    if args.date_to:
+        filters["date_to"] = args.date_to
+    if args.malnutrition:
+        filters["malnutrition"] = MALNUTRITION_CHOICES[args.malnutrition]
+    return filters
+
+
+def _print_progress(done, total):
+    if total:
+        print(f"\rEsportate {done}/{total} righe...", end="", file=sys.stderr)
+
+
+def cmd_export(args) -> int:
+    from export_utils import EXPORT_HEADERS, export_pages
+
+    db.init_db()
+    filters = _filters(args)
+    total = db.count_registry(**filters)
+    n = export_pages(
+        args.format,
+        db.iter_registry_pages(columns=EXPORT_HEADERS, **filters),
+        args.output,
+        total=total,
+        progress=None if args.quiet else _print_progress,
+    )
+    if not args.quiet and total:
+        print(file=sys.stderr)
+    print(f"Esportate {n} righe in {args.output} ({args.format})")
+    return 0
+
+
+def cmd_export_changes(args) -> int:
+    from export_utils import export_changes_to_jsonl
+
+    db.init_db()
+    n, last_seq = export_changes_to_jsonl(db.iter_changes(args.after), args.output)
+    # l'ultimo seq va ripassato con --after al prossimo export
+    print(f"Esportate {n} modifiche in {args.output}; ultimo seq: {last_seq or args.after}")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    from merge_utils import merge_databases
+
+    db.init_db()
+    merge_databases(args.sources, policy=args.policy, progress=lambda r: print(r.summary()))
+    return 0
+
+
+def cmd_recompute_whz(args) -> int:
+    """Ricalcola il WHZ di tutte le righe; con --dry-run si limita a segnalare le differenze."""
+    from whz import compute_whz_batch
+
+    db.init_db()
+    cols = ["weight", "height", "gender", "declared_age", "whz"]
+    checked = 0
+    changed = []
+    for page in db.iter_registry_pages(columns=cols, page_size=args.batch_size):
+        new = compute_whz_batch(
+            [r["weight"] for r in page],
+            [r["height"] for r in page],
+            [r["gender"] for r in page],
+            [r["declared_age"] for r in page],
+            decimals=1,
+        )
+        for r, z in zip(page, new):
+            z = None if math.isnan(z) else float(z)
+            old = r["whz"]
+            if (z is None) != (old is None) or (z is not None and abs(z - old) > 1e-6):
+                changed.append((z, r["taratassi"], old))
+        checked += len(page)
+
+    for z, taratassi, old in changed[:args.show]:
+        print(f"  {taratassi}: {old} -> {z}")
+    if len(changed) > args.show:
+        print(f"  ... e altre {len(changed) - args.show}")
+
+    if not args.dry_run and changed:
+        with db.get_conn() as conn:
+            conn.executemany("UPDATE registry SET whz = ? WHERE taratassi = ?", [c[:2] for c in changed])
+        db.invalidate_records()
+
+    action = "da aggiornare" if args.dry_run else "aggiornate"
+    print(f"Righe controllate: {checked}, {action}: {len(changed)}")
+    return 1 if args.dry_run and changed else 0
+
+
+def cmd_stats(args) -> int:
+    import stats
+
+    db.init_db()
+    conn = db.get_conn()
+    total, first, last = conn.execute(
+        "SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM registry"
+    ).fetchone()
+    print(f"DB: {db.DB_PATH}")
+    print(f"Righe: {total} (dal {first or '-'} al {last or '-'})")
+    print(f"  {'villaggio':<12} {'sesso':<8} {'bambini':>8} {'moderata':>9} {'severa':>9}")
+    for r in stats.prevalence(("village", "gender")):
+        print(
+            f"  {r['village']:<12} {r['gender']:<8} {r['total']:>8} "
+            f"{_pct(r['moderate_pct']):>9} {_pct(r['severe_pct']):>9}"
+        )
+    print(f"Ultima modifica registrata: seq {db.last_change_seq()}")
+    return 0
+
+
+def _pct(v) -> str:
+    return "-" if v is None else f"{v:.1f}%"
+
+
+def cmd_rebuild_stats(args) -> int:
+    """Ricalcola i contatori delle statistiche; con --check li confronta soltanto."""
+    import stats
+
+    db.init_db()
+    if not args.check:
+        stats.rebuild_summary()
+        print("Contatori delle statistiche ricalcolati.")
+        return 0
+
+    diffs = stats.check_summary()
+    for table, key, expected, found in diffs[:args.show]:
+        print(f"  {table} {key}: atteso {expected}, trovato {found}")
+    if len(diffs) > args.show:
+        print(f"  ... e altre {len(diffs) - args.show}")
+    print("Contatori corretti" if not diffs else f"Contatori non allineati: {len(diffs)} differenze")
+    return 1 if diffs else 0
+
+
+def cmd_vacuum(args) -> int:
+    db.init_db()
+    conn = db.get_conn()
+    conn.execute("VACUUM")
+    # VACUUM può rinumerare i rowid: l'indice full-text va riallineato
+    db.rebuild_search_index(conn)
+    conn.execute("PRAGMA optimize")
+    print(f"VACUUM completato: {db.DB_PATH}")
+    return 0
+
+
+def cmd_integrity_check(args) -> int:
+    db.init_db()
+    conn = db.get_conn()
+    problems = [r[0] for r in conn.execute("PRAGMA integrity_check") if r[0] != "ok"]
+    problems += [f"foreign key: {tuple(r)}" for r in conn.execute("PRAGMA foreign_key_check")]
+    if db.fts_available(conn):
+        try:
+            conn.execute("INSERT INTO registry_fts (registry_fts) VALUES ('integrity-check')")
+        except Exception as e:
+            problems.append(f"indice full-text: {e} (usa 'vacuum' per ricostruirlo)")
+
+    if problems:
+        for p in problems:
+            print(p)
+        return 1
+    print("Integrità OK")
+    return 0
+
+
+def cmd_generate(args) -> int:
+    """Riempie un DB (di prova!) con righe sintetiche; non tocca il DB dell'app se non con --db."""
+    import time
+    from synthetic import generate_db
+
+    t = time.perf_counter()
+    n = generate_db(
+        args.output, args.rows, seed=args.seed, start=args.start, days=args.days, check=args.check,
+        progress=None if args.quiet else _print_generated,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Generate {n} righe in {args.output} ({time.perf_counter() - t:.1f}s)")
+    return 0
+
+
+def _print_generated(done, total):
+    print(f"\rGenerate {done}/{total} righe...", end="", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="questionario", description="Operazioni batch sul DB del questionario.")
+    parser.add_argument("--db", help="file SQLite da usare (default: quello dell'app)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init", help="crea il DB o applica le migrazioni")
+    p.set_defaults(func=cmd_init)
+
+    from migrations import BACKFILL_BATCH_SIZE
+    p = sub.add_parser("migrate", help="applica le migrazioni mostrando i tempi")
+    p.add_argument("--dry-run", action="store_true", help="prova su una copia temporanea del DB e misura i tempi")
+    p.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="righe per transazione nei riempimenti")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("import", help="importa CSV (formato export) o JSON lines")
+    p.add_argument("files", nargs="+")
+    p.add_argument("--replace", action="store_true", help="aggiorna i taratassi già presenti")
+    p.add_argument("--changes", action="store_true", help="i file sono export incrementali (export-changes)")
+    p.add_argument(
+        "--lenient", action="store_true",
+        help="accetta righe senza consenso, con età 0 o WHZ non calcolabile (solo i vincoli della tabella)",
+    )
+    p.add_argument("--batch-size", type=int, default=5000)
+    p.set_defaults(func=cmd_import)
+
+    from export_utils import EXPORTERS
+    p = sub.add_parser("export", help="esporta registry")
+    p.add_argument("output")
+    p.add_argument("--format", default="csv", choices=sorted(EXPORTERS))
+    p.add_argument("--village")
+    p.add_argument("--gender")
+    p.add_argument("--date-from", help="YYYY-MM-DD")
+    p.add_argument("--date-to", help="YYYY-MM-DD")
+    p.add_argument("--malnutrition", choices=list(MALNUTRITION_CHOICES), help="solo questa classe")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("export-changes", help="esporta solo le modifiche dopo un certo seq (JSON lines)")
+    p.add_argument("output")
+    p.add_argument("--after", type=int, default=0, help="ultimo seq già consegnato")
+    p.set_defaults(func=cmd_export_changes)
+
+    p = sub.add_parser("merge", help="unisce altri DB in questo")
+    p.add_argument("sources", nargs="+")
+    p.add_argument("--policy", default="latest", choices=["latest", "keep_both"])
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("recompute-whz", help="ricalcola (o verifica) il WHZ di tutte le righe")
+    p.add_argument("--dry-run", action="store_true", help="segnala le differenze senza scrivere")
+    p.add_argument("--batch-size", type=int, default=5000)
+    p.add_argument("--show", type=int, default=20, help="differenze da mostrare")
+    p.set_defaults(func=cmd_recompute_whz)
+
+    p = sub.add_parser("stats", help="riepilogo del contenuto del DB")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("rebuild-stats", help="ricalcola (o verifica) i contatori delle statistiche")
+    p.add_argument("--check", action="store_true", help="confronta con un ricalcolo completo senza scrivere")
+    p.add_argument("--show", type=int, default=20, help="differenze da mostrare")
+    p.set_defaults(func=cmd_rebuild_stats)
+
+    p = sub.add_parser("vacuum", help="compatta il DB e ricostruisce gli indici di ricerca")
+    p.set_defaults(func=cmd_vacuum)
+
+    p = sub.add_parser("integrity-check", help="verifica l'integrità del DB")
+    p.set_defaults(func=cmd_integrity_check)
+
+    p = sub.add_parser("generate", help="crea un DB di prova con righe sintetiche")
+    p.add_argument("output", help="file SQLite da creare o a cui aggiungere righe")
+    p.add_argument("rows", type=int)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--start", type=int, default=0, help="primo numero dei taratassi SYN...")
+    p.add_argument("--days", type=int, default=365, help="giorni coperti da created_at")
+    p.add_argument("--check", action="store_true", help="verifica i vincoli CHECK a fine caricamento")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=cmd_generate)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.db:
+        db.use_db(args.db)
+    try:
+        return args.func(args)
+    except (RuntimeError, ValueError, OSError, sqlite3.Error) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close_all()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,13 @@
+import os
 import sqlite3
 import sys
+import threading
+import traceback
+from collections import OrderedDict
 from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence
 
-from migrations import migrate_if_needed
+from migrations import BACKFILL_BATCH_SIZE, LogFn, get_db_version, migrate_if_needed, schema_is_current
 
 APP_DB_FILENAME = "questionario.sqlite3"
 
@@ -38,11 +43,39 @@ def db_path() -> Path:
 
 DB_PATH = db_path()
 
+# PRAGMA applicati una sola volta, all'apertura di ogni connessione
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",        # ~8 MB di page cache
+    "PRAGMA mmap_size = 67108864",      # 64 MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
 
+# una connessione persistente per thread (GUI, worker, ...)
+_local = threading.local()
+_open_conns: list[sqlite3.Connection] = []
+_conns_lock = threading.Lock()
+# cresce con close_all() e safe_eject(): una connessione aperta prima va riaperta
+_conns_generation = 0
 
-def get_conn():
+
+def use_db(path) -> None:
+    """Punta il modulo su un altro file DB (es. da riga di comando), chiudendo le connessioni aperte."""
+    global DB_PATH
+    close_all()
+    DB_PATH = Path(path)
+
+
+def _connect() -> sqlite3.Connection:
     try:
-        conn = sqlite3.connect(DB_PATH)
+        # check_same_thread=False solo per poterla chiudere da close_all():
+        # ogni connessione resta usata dal thread che l'ha aperta
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
     except sqlite3.OperationalError as e:
         # Tipico su macOS se stai lanciando da DMG / Applications senza permessi
         raise RuntimeError(
@@ -54,98 +87,536 @@ def get_conn():
     return conn
 
 
-def init_db():
-    with get_conn() as conn:
-        migrate_if_needed(conn)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS registry (
-                taratassi TEXT PRIMARY KEY UNIQUE,
-                village TEXT NOT NULL CHECK (village IN ('Andavadoaka','Befandefa')),
-                consent INTEGER NOT NULL CHECK (consent IN (0,1)),
-                witnessed INTEGER NOT NULL CHECK (witnessed IN (0,1)),
-                declared_age INTEGER NOT NULL CHECK (declared_age >= 0),
-                age_estimation INTEGER NOT NULL CHECK (age_estimation >= 0),
-                gender TEXT NOT NULL CHECK (gender IN ('Maschio','Femmina')),
-                muac REAL NOT NULL,
-                weight REAL NOT NULL,
-                height REAL NOT NULL,
-                whz REAL,
-                q1 TEXT NOT NULL CHECK (q1 IN ('Sì','No','Non so')),
-                q2 TEXT NOT NULL CHECK (q2 IN ('Sì','No','Non so')),
-                q3 TEXT NOT NULL CHECK (q3 IN ('Sì','No','Non so')),
-                q4 TEXT NOT NULL CHECK (q4 IN ('Sì','No','Non so')),
-                q5 TEXT NOT NULL CHECK (q5 IN ('Sì','No','Non so')),
-                created_at TEXT NOT NULL DEFAULT (datetime('now'))
-            );
-            """
-        )
+def get_conn() -> sqlite3.Connection:
+    """
+    Restituisce la connessione del thread corrente, aprendola alla prima richiesta.
+    Va usata come context manager (`with get_conn() as conn:`) per le transazioni:
+    il `with` fa commit/rollback ma NON chiude la connessione.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "generation", None) != _conns_generation:
+        # chiusa da close_all() o da ricambiare dopo safe_eject(): la chiude il suo thread
+        close_conn()
+        conn = None
+    if conn is None:
+        conn = _connect()
+        with _conns_lock:
+            _local.generation = _conns_generation
+            _open_conns.append(conn)
+        _local.conn = conn
+    return conn
+
+
+def close_conn() -> None:
+    """Chiude la connessione del thread corrente (es. alla fine di un worker)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    with _conns_lock:
+        if conn in _open_conns:
+            _open_conns.remove(conn)
+    try:
+        conn.close()   # già chiusa se è passato close_all()
+    except sqlite3.Error:
+        pass
+
+
+def close_all() -> None:
+    """
+    Chiude tutte le connessioni aperte (alla chiusura dell'app o cambiando DB, con
+    i worker fermi): i thread che le usavano ne aprono una nuova alla richiesta successiva.
+    """
+    global _conns_generation
+    with _conns_lock:
+        conns = list(_open_conns)
+        _open_conns.clear()
+        _conns_generation += 1
+    _local.conn = None
+    for conn in conns:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+# checkpoint del WAL in un thread a parte: altrimenti lo fa il commit che supera
+# wal_autocheckpoint, e su una chiavetta lenta quel salvataggio resta bloccato
+# sull'fsync del file principale
+CHECKPOINT_INTERVAL = 30.0   # secondi
+_checkpointer: Optional[threading.Thread] = None
+_checkpointer_stop = threading.Event()
+
+
+def _wal_state() -> Optional[tuple]:
+    try:
+        st = os.stat(f"{DB_PATH}-wal")
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns) if st.st_size else None
+
+
+def _checkpoint_loop(interval: float) -> None:
+    done = None
+    while not _checkpointer_stop.wait(interval):
+        # WAL vuoto o fermo dall'ultimo giro: nessuna connessione, nessun I/O
+        state = _wal_state()
+        if state is None or state == done:
+            continue
+        try:
+            # connessione propria, fuori da _open_conns: close_all() non la tocca
+            conn = _connect()
+            try:
+                busy, _, _ = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            finally:
+                conn.close()
+        except (sqlite3.Error, RuntimeError):
+            continue   # si riprova al giro dopo
+        if not busy:
+            done = _wal_state()
+
+
+def start_checkpointer(interval: float = CHECKPOINT_INTERVAL) -> None:
+    """Avvia (una volta sola) il thread che riversa periodicamente il WAL nel DB."""
+    global _checkpointer
+    if _checkpointer is not None and _checkpointer.is_alive():
+        return
+    _checkpointer_stop.clear()
+    _checkpointer = threading.Thread(
+        target=_checkpoint_loop, args=(interval,), name="wal-checkpoint", daemon=True
+    )
+    _checkpointer.start()
+
+
+def stop_checkpointer() -> None:
+    global _checkpointer
+    if _checkpointer is None:
+        return
+    _checkpointer_stop.set()
+    _checkpointer.join()
+    _checkpointer = None
+
+
+def safe_eject() -> None:
+    """
+    Prepara il DB a staccare la chiavetta: riversa tutto il WAL nel file principale
+    e lo tronca, così il .sqlite3 da solo è completo.
+    Chiude solo la connessione del thread chiamante: quelle degli altri thread
+    (scrittura, ricerca) le chiudono e riaprono i thread stessi al prossimo uso;
+    chiuderle da qui vorrebbe dire farlo magari mentre stanno lavorando.
+    """
+    global _conns_generation
+    conn = get_conn()
+    busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    if busy:
+        raise RuntimeError("Il DB è in uso (export o ricerca in corso): riprova tra qualche secondo.")
+    with _conns_lock:
+        _conns_generation += 1
+    close_conn()
+
+
+# tabella base (schema v1): le migrazioni partono da qui
+REGISTRY_V1_DDL = """
+CREATE TABLE IF NOT EXISTS registry (
+    taratassi TEXT PRIMARY KEY UNIQUE,
+    village TEXT NOT NULL CHECK (village IN ('Andavadoaka','Befandefa')),
+    consent INTEGER NOT NULL CHECK (consent IN (0,1)),
+    witnessed INTEGER NOT NULL CHECK (witnessed IN (0,1)),
+    declared_age INTEGER NOT NULL CHECK (declared_age >= 0),
+    age_estimation INTEGER NOT NULL CHECK (age_estimation >= 0),
+    gender TEXT NOT NULL CHECK (gender IN ('Maschio','Femmina')),
+    muac REAL NOT NULL,
+    weight REAL NOT NULL,
+    height REAL NOT NULL,
+    whz REAL,
+    q1 TEXT NOT NULL CHECK (q1 IN ('Sì','No','Non so')),
+    q2 TEXT NOT NULL CHECK (q2 IN ('Sì','No','Non so')),
+    q3 TEXT NOT NULL CHECK (q3 IN ('Sì','No','Non so')),
+    q4 TEXT NOT NULL CHECK (q4 IN ('Sì','No','Non so')),
+    q5 TEXT NOT NULL CHECK (q5 IN ('Sì','No','Non so')),
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+
+def init_db(*, batch_size: int = BACKFILL_BATCH_SIZE, log: Optional[LogFn] = None) -> None:
+    conn = get_conn()
+    # percorso di ogni avvio: schema già aggiornato, nessuna scrittura sul file
+    if schema_is_current(conn):
+        return
+    # la tabella base serve solo a un DB ancora alla versione 1 (nuovo, o lasciato
+    # con schema_version vuota dal vecchio init_db): da lì in poi ci pensano le migrazioni
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "registry" not in tables and ("schema_version" not in tables or get_db_version(conn) <= 1):
+        with conn:
+            conn.execute(REGISTRY_V1_DDL)
+    migrate_if_needed(conn, batch_size=batch_size, log=log)
+
+
+_INSERT_SQL = """
+    INSERT INTO registry (
+      taratassi, village, consent, witnessed,
+      declared_age, age_estimation, gender, muac, weight, height, whz,
+      q1, q2, q3, q4, q5, q6
+    ) VALUES (
+      :taratassi, :village, :consent, :witnessed,
+      :declared_age, :age_estimation, :gender, :muac, :weight, :height, :whz,
+      :q1, :q2, :q3, :q4, :q5, :q6
+    )
+"""
 
 
 def insert_registry(data: dict):
     if not data['muac']:
         data['muac'] = 0.0
     with get_conn() as conn:
-        conn.execute(
-            """
-            INSERT INTO registry (
-              taratassi, village, consent, witnessed,
-              declared_age, age_estimation, gender, muac, weight, height, whz,
-              q1, q2, q3, q4, q5, q6
-            ) VALUES (
-              :taratassi, :village, :consent, :witnessed,
-              :declared_age, :age_estimation, :gender, :muac, :weight, :height, :whz,
-              :q1, :q2, :q3, :q4, :q5, :q6
-            )
-            """,
-            data,
-        )
+        conn.execute(_INSERT_SQL, data)
+        # rilettura: created_at e malnutrition li scrive il DB
+        row = _read_record(conn, data["taratassi"])
+    _store([("insert", data["taratassi"], row)])
+
+
+REGISTRY_COLUMNS = (
+    "taratassi", "village", "consent", "witnessed",
+    "declared_age", "age_estimation", "gender", "muac", "weight", "height", "whz",
+    "q1", "q2", "q3", "q4", "q5", "q6",
+    "created_at",
+)
+# colonne calcolate dal DB (trigger), leggibili e filtrabili ma mai scritte dall'app
+DERIVED_COLUMNS = ("malnutrition",)
+# una riga completa, come la ritorna get_registry
+RECORD_COLUMNS = REGISTRY_COLUMNS + DERIVED_COLUMNS
+PAGE_SIZE = 500
+FTS_MIN_CHARS = 3   # il tokenizer trigram non trova sottostringhe più corte
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'registry_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    """
+    Ricostruisce l'indice full-text da zero.
+    Serve dopo un VACUUM, che può rinumerare i rowid di registry.
+    """
+    if fts_available(conn):
+        with conn:
+            conn.execute("INSERT INTO registry_fts (registry_fts) VALUES ('rebuild')")
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _registry_filters(
+    conn: sqlite3.Connection,
+    *,
+    taratassi: str = "",
+    prefix: bool = False,
+    village: str | None = None,
+    gender: str | None = None,
+    age_min: int | None = None,
+    age_max: int | None = None,
+    whz_min: float | None = None,
+    whz_max: float | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    malnutrition: int | Sequence[int] | None = None,
+) -> tuple[str, list]:
+    """Costruisce la clausola WHERE (con parametri) per i filtri di ricerca."""
+    clauses: list[str] = []
+    params: list = []
+
+    text = (taratassi or "").strip()
+    if text and prefix:
+        # range sulla chiave primaria: usa l'indice, niente scansione
+        clauses.append("taratassi >= ? AND taratassi < ?")
+        params += [text, text + "\U0010ffff"]
+    elif len(text) >= FTS_MIN_CHARS and fts_available(conn):
+        clauses.append("rowid IN (SELECT rowid FROM registry_fts WHERE registry_fts MATCH ?)")
+        params.append('"' + text.replace('"', '""') + '"')
+    elif text:
+        clauses.append("taratassi LIKE ? ESCAPE '\\'")
+        params.append(f"%{_like_escape(text)}%")
 
+    if village:
+        clauses.append("village = ?")
+        params.append(village)
+    if gender:
+        clauses.append("gender = ?")
+        params.append(gender)
+    # età in mesi (dichiarata, la stessa usata per il WHZ), estremi inclusi
+    if age_min is not None:
+        clauses.append("declared_age >= ?")
+        params.append(age_min)
+    if age_max is not None:
+        clauses.append("declared_age <= ?")
+        params.append(age_max)
+    # fascia WHZ semiaperta [whz_min, whz_max), come le soglie di malnutrizione
+    if whz_min is not None:
+        clauses.append("whz >= ?")
+        params.append(whz_min)
+    if whz_max is not None:
+        clauses.append("whz < ?")
+        params.append(whz_max)
+    # date 'YYYY-MM-DD', estremi inclusi
+    if date_from:
+        clauses.append("created_at >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(date_to)
+    # classe di malnutrizione salvata (whz.CLASS_*), una o più
+    if malnutrition is not None:
+        codes = [malnutrition] if isinstance(malnutrition, int) else list(malnutrition)
+        clauses.append(f"malnutrition IN ({', '.join('?' * len(codes))})")
+        params += codes
 
-def list_registry(search: str = ""):
-    q = """
+    where = " AND ".join(clauses) if clauses else "1"
+    return where, params
+
+
+def search_registry(*, limit: int | None = None, offset: int = 0, **filters):
+    """
+    Ricerca strutturata su registry, ordinata per data di creazione decrescente.
+
+    Filtri (tutti opzionali, combinati in AND):
+      - taratassi: sottostringa (o prefisso se prefix=True)
+      - village, gender: valore esatto
+      - age_min, age_max: età dichiarata in mesi, estremi inclusi
+      - whz_min, whz_max: fascia WHZ [whz_min, whz_max)
+      - date_from, date_to: date 'YYYY-MM-DD' di creazione, estremi inclusi
+    """
+    conn = get_conn()
+    where, params = _registry_filters(conn, **filters)
+    q = f"""
     SELECT *
     FROM registry
-    WHERE taratassi LIKE ?
-    ORDER BY created_at DESC
+    WHERE {where}
+    ORDER BY created_at DESC, taratassi DESC
     """
-    like = f"%{search.strip()}%"
-    with get_conn() as conn:
-        return conn.execute(q, (like,)).fetchall()
+    if limit is not None:
+        q += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with conn:
+        return conn.execute(q, params).fetchall()
+
 
+def count_registry(**filters) -> int:
+    conn = get_conn()
+    where, params = _registry_filters(conn, **filters)
+    with conn:
+        return conn.execute(f"SELECT COUNT(*) FROM registry WHERE {where}", params).fetchone()[0]
 
-def get_registry(taratassi: str):
+
+def list_registry(search: str = "", limit: int | None = None, offset: int = 0):
+    return search_registry(taratassi=search, limit=limit, offset=offset)
+
+
+def _projection(columns: Sequence[str] | None) -> list[str]:
+    if not columns:
+        return list(REGISTRY_COLUMNS)
+    unknown = [c for c in columns if c not in REGISTRY_COLUMNS and c not in DERIVED_COLUMNS]
+    if unknown:
+        raise ValueError(f"Colonne non valide: {', '.join(unknown)}")
+    cols = list(columns)
+    # servono sempre per calcolare il cursore della pagina successiva
+    for key in ("created_at", "taratassi"):
+        if key not in cols:
+            cols.append(key)
+    return cols
+
+
+def list_registry_page(
+    *,
+    columns: Sequence[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    after: tuple[str, str] | None = None,
+    **filters,
+):
+    """
+    Una pagina di registry (stesso ordinamento e filtri di search_registry),
+    con paginazione keyset su (created_at, taratassi).
+
+    Ritorna (righe, cursore): il cursore va ripassato come `after` per la pagina
+    successiva ed è None quando non ci sono altre righe.
+    `columns` limita le colonne lette (created_at e taratassi sono sempre incluse).
+    """
+    cols = _projection(columns)
+    conn = get_conn()
+    where, params = _registry_filters(conn, **filters)
+    if after is not None:
+        where += " AND (created_at, taratassi) < (?, ?)"
+        params += list(after)
+
+    q = f"""
+    SELECT {", ".join(cols)}
+    FROM registry
+    WHERE {where}
+    ORDER BY created_at DESC, taratassi DESC
+    LIMIT ?
+    """
+    params.append(page_size)
+    with _records_lock:
+        generation = _records_generation
+    with conn:
+        rows = conn.execute(q, params).fetchall()
+    if set(RECORD_COLUMNS) <= set(cols):
+        _remember(rows, generation)
+
+    if len(rows) < page_size:
+        return rows, None
+    last = rows[-1]
+    return rows, (last["created_at"], last["taratassi"])
+
+
+def iter_registry_pages(
+    *,
+    columns: Sequence[str] | None = None,
+    page_size: int = PAGE_SIZE,
+    **filters,
+) -> Iterator[list]:
+    """Genera le pagine di registry una alla volta, senza caricare tutta la tabella."""
+    cursor = None
+    while True:
+        rows, cursor = list_registry_page(columns=columns, page_size=page_size, after=cursor, **filters)
+        if rows:
+            yield rows
+        if cursor is None:
+            return
+
+
+# ---------- cache dei record ----------
+#
+# Righe complete di registry per taratassi, condivise tra i thread: le riempiono le
+# letture che hanno già tutte le colonne (es. le pagine della tabella risultati) e le
+# aggiornano le scritture di questo modulo dopo il commit (write-through).
+# Chi scrive registry per altre strade (import, merge, altri processi) chiama
+# invalidate_records(). Gli ascoltatori (add_record_listener) ricevono
+# (op, taratassi, riga) per "insert" / "update" / "delete", e ("invalidate", None, None)
+# quando la cache viene svuotata: vengono chiamati nel thread che ha scritto.
+
+RECORD_CACHE_SIZE = 2000
+RecordListener = Callable[[str, Optional[str], Optional[dict]], None]
+
+_records: "OrderedDict[str, dict]" = OrderedDict()
+_records_lock = threading.Lock()
+# cresce a ogni scrittura: una lettura iniziata prima non può più riempire la cache
+_records_generation = 0
+_record_listeners: list[RecordListener] = []
+
+
+def add_record_listener(fn: RecordListener) -> None:
+    with _records_lock:
+        _record_listeners.append(fn)
+
+
+def remove_record_listener(fn: RecordListener) -> None:
+    with _records_lock:
+        if fn in _record_listeners:
+            _record_listeners.remove(fn)
+
+
+def _notify(op: str, taratassi: Optional[str], row: Optional[dict]) -> None:
+    with _records_lock:
+        listeners = list(_record_listeners)
+    for fn in listeners:
+        # la scrittura è già committata: un listener che fallisce non deve farla
+        # risultare non salvata, né togliere la notifica agli altri
+        try:
+            fn(op, taratassi, row)
+        except Exception:
+            traceback.print_exc()
+
+
+def _remember(rows, generation: int) -> None:
+    """Mette in cache righe complete lette quando la generazione era `generation`."""
+    with _records_lock:
+        if generation != _records_generation:
+            return   # nel frattempo qualcuno ha scritto: le righe potrebbero essere vecchie
+        for r in rows:
+            _records[r["taratassi"]] = dict(r)
+            _records.move_to_end(r["taratassi"])
+        while len(_records) > RECORD_CACHE_SIZE:
+            _records.popitem(last=False)
+
+
+def _store(changes) -> None:
+    """Write-through dopo un commit: [(op, taratassi, riga o None)]."""
+    global _records_generation
+    with _records_lock:
+        _records_generation += 1
+        for op, taratassi, row in changes:
+            if row is None:
+                _records.pop(taratassi, None)
+            else:
+                _records[taratassi] = row
+                _records.move_to_end(taratassi)
+        while len(_records) > RECORD_CACHE_SIZE:
+            _records.popitem(last=False)
+    for op, taratassi, row in changes:
+        _notify(op, taratassi, row)
+
+
+def invalidate_records(taratassi: Optional[str] = None) -> None:
+    """Scarta dalla cache una riga (o tutte, con None) scritta senza passare da qui."""
+    global _records_generation
+    with _records_lock:
+        _records_generation += 1
+        if taratassi is None:
+            _records.clear()
+        else:
+            _records.pop(taratassi, None)
+    _notify("invalidate", taratassi, None)
+
+
+def _read_record(conn: sqlite3.Connection, taratassi: str) -> Optional[dict]:
+    row = conn.execute("SELECT * FROM registry WHERE taratassi = ?", (taratassi,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_registry(taratassi: str) -> Optional[dict]:
+    """La riga completa di `taratassi` (None se non c'è), dalla cache se possibile."""
+    with _records_lock:
+        row = _records.get(taratassi)
+        generation = _records_generation
+    if row is not None:
+        return dict(row)
     with get_conn() as conn:
-        return dict(conn.execute(
-            "SELECT * FROM registry WHERE taratassi = ?",
-            (taratassi,),
-        ).fetchone())
+        row = _read_record(conn, taratassi)
+    if row is not None:
+        _remember([row], generation)
+    return row
+
+
+# taratassi resta chiave primaria e NON viene modificato
+_UPDATE_SQL = """
+    UPDATE registry SET
+      village = :village,
+      consent = :consent,
+      witnessed = :witnessed,
+      declared_age = :declared_age,
+      age_estimation = :age_estimation,
+      gender = :gender,
+      muac = :muac,
+      weight = :weight,
+      height = :height,
+      whz = :whz,
+      q1 = :q1, q2 = :q2, q3 = :q3, q4 = :q4, q5 = :q5, q6 = :q6
+    WHERE taratassi = :taratassi
+"""
 
 
 def update_registry(taratassi: str, data: dict):
-    # taratassi resta chiave primaria e NON viene modificato
     data = dict(data)
     data["taratassi"] = taratassi
     with get_conn() as conn:
-        conn.execute(
-            """
-            UPDATE registry SET
-              village = :village,
-              consent = :consent,
-              witnessed = :witnessed,
-              declared_age = :declared_age,
-              age_estimation = :age_estimation,
-              gender = :gender,
-              muac = :muac,
-              weight = :weight,
-              height = :height,
-              whz = :whz,
-              q1 = :q1, q2 = :q2, q3 = :q3, q4 = :q4, q5 = :q5, q6 = :q6
-            WHERE taratassi = :taratassi
-            """,
-            data,
-        )
+        conn.execute(_UPDATE_SQL, data)
+        row = _read_record(conn, taratassi)
+    _store([("update", taratassi, row)])
 
 def delete_registry(taratassi: str):
     with get_conn() as conn:
@@ -154,3 +625,98 @@ def delete_registry(taratassi: str):
             "DELETE FROM registry WHERE taratassi = ?",
             (taratassi,)
         )
+    _store([("delete", taratassi, None)])
+
+
+def _write(conn: sqlite3.Connection, op: str, taratassi: str, data: Optional[dict]) -> Optional[dict]:
+    """Esegue una scrittura e ritorna la riga come è ora nel DB (None se eliminata)."""
+    if op == "insert":
+        data = {**data, "taratassi": taratassi}
+        if not data["muac"]:
+            data["muac"] = 0.0
+        conn.execute(_INSERT_SQL, data)
+    elif op == "update":
+        conn.execute(_UPDATE_SQL, {**data, "taratassi": taratassi})
+    elif op == "delete":
+        conn.execute("DELETE FROM registry WHERE taratassi = ?", (taratassi,))
+    else:
+        raise ValueError(f"Operazione non valida: {op}")
+    return _read_record(conn, taratassi)
+
+
+def apply_writes(writes: Sequence[tuple]) -> list[Optional[sqlite3.Error]]:
+    """
+    Esegue più scritture (op, taratassi, dati) con un solo commit, quindi un solo
+    fsync; op è "insert", "update" o "delete" (dati = None).
+    Ogni scrittura ha il suo SAVEPOINT: un errore (es. taratassi già esistente)
+    annulla solo quella. Ritorna, nello stesso ordine, None o l'errore di ciascuna;
+    se fallisce il commit l'eccezione arriva al chiamante e non resta scritto nulla.
+    """
+    results: list[Optional[sqlite3.Error]] = []
+    changes = []
+    conn = get_conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for op, taratassi, data in writes:
+            conn.execute("SAVEPOINT write")
+            try:
+                row = _write(conn, op, taratassi, data)
+            except sqlite3.Error as e:
+                conn.execute("ROLLBACK TO write")
+                results.append(e)
+            else:
+                results.append(None)
+                changes.append((op, taratassi, row))
+            conn.execute("RELEASE write")
+    _store(changes)
+    return results
+
+
+# ---------- registro modifiche (export incrementali) ----------
+
+def last_change_seq() -> int:
+    """Numero di sequenza dell'ultima modifica registrata (0 se nessuna)."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT MAX(seq) FROM registry_changes").fetchone()
+    return row[0] or 0
+
+
+def iter_changes(after_seq: int = 0, page_size: int = PAGE_SIZE) -> Iterator[list]:
+    """
+    Pagine dello stato finale dei taratassi modificati dopo `after_seq`, in ordine di seq.
+    Ogni riga ha seq, op ('U' = inserito/aggiornato, 'D' = eliminato) e le colonne
+    di registry (NULL per le eliminazioni). Più modifiche allo stesso taratassi
+    contano una volta sola, con l'ultima seq.
+    """
+    cols = ", ".join(f"r.{c}" for c in REGISTRY_COLUMNS if c != "taratassi")
+    q = f"""
+    SELECT c.seq,
+           CASE WHEN r.taratassi IS NULL THEN 'D' ELSE 'U' END AS op,
+           c.taratassi, {cols}
+    FROM registry_changes AS c
+    LEFT JOIN registry AS r ON r.taratassi = c.taratassi
+    WHERE c.seq > ?
+      AND NOT EXISTS (
+        SELECT 1 FROM registry_changes AS c2
+        WHERE c2.taratassi = c.taratassi AND c2.seq > c.seq
+      )
+    ORDER BY c.seq
+    LIMIT ?
+    """
+    conn = get_conn()
+    cursor = after_seq
+    while True:
+        with conn:
+            rows = conn.execute(q, (cursor, page_size)).fetchall()
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = rows[-1]["seq"]
+
+
+def prune_changes(up_to_seq: int) -> int:
+    """Elimina dal registro le modifiche già consegnate (seq <= up_to_seq)."""
+    with get_conn() as conn:
+        return conn.execute("DELETE FROM registry_changes WHERE seq <= ?", (up_to_seq,)).rowcount
+
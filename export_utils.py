@@ -1,9 +1,41 @@
 import csv
+import gzip
+import importlib.util
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from operator import itemgetter
 from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
 
 
 BOOLEAN_FIELDS = {"consent", "witnessed"}
 
+# formato di created_at nel database (datetime('now') di SQLite)
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+EXPORT_HEADERS = [
+    "taratassi", "village", "consent", "witnessed",
+    "declared_age", "age_estimation", "gender", "muac", "weight", "height", 'whz', "q1", "q2", "q3", "q4", "q5", "q6",
+    "created_at"
+]
+EXPORT_LABELS = [
+    'Taratassi', 'Villaggio', 'Spiegazione consenso informato', 'Consenso orale con testimone',
+    'Età Dichiarata', 'Età Stimata', 'Sesso', 'MUAC', 'Peso (KG)', 'Altezza (cm)',
+    'Indice WHZ', 'Domanda 1', 'Domanda 2', 'Domanda 3', 'Domanda 4', 'Domanda 5', 'Domanda 6', 'Data creazione'
+]
+
+# progress(righe_scritte, totale) - totale può essere None se non noto
+ProgressFn = Callable[[int, Optional[int]], None]
+
+
+class ExportCancelled(Exception):
+    """Export interrotto dall'utente: il file di destinazione non viene creato."""
+
 
 def csv_value(value, field_name=None):
     if field_name in BOOLEAN_FIELDS:
@@ -15,23 +47,321 @@ def csv_value(value, field_name=None):
     return "" if value is None else value
 
 
-def export_rows_to_csv(rows, filepath: str):
-    path = Path(filepath)
-    headers = [
-        "taratassi", "village", "consent", "witnessed",
-        "declared_age", "age_estimation", "gender", "muac", "weight", "height", 'whz', "q1", "q2", "q3", "q4", "q5", "q6",
-        "created_at"
-    ]
-    header_label = [
-        'Taratassi', 'Villaggio', 'Spiegazione consenso informato', 'Consenso orale con testimone',
-        'Età Dichiarata', 'Età Stimata', 'Sesso', 'MUAC', 'Peso (KG)', 'Altezza (cm)',
-        'Indice WHZ', 'Domanda 1', 'Domanda 2', 'Domanda 3', 'Domanda 4', 'Domanda 5', 'Domanda 6', 'Data creazione'
+def _bool_value(value):
+    if value == 1:
+        return "SI"
+    if value == 0:
+        return "NO"
+    return ""
+
+
+def _plain_value(value):
+    return "" if value is None else value
+
+
+# un formattatore per colonna, scelto una volta sola invece che per ogni cella
+COLUMN_FORMATTERS = [
+    _bool_value if h in BOOLEAN_FIELDS else _plain_value for h in EXPORT_HEADERS
+]
+
+
+def _row_getter(sample_row) -> Callable:
+    """
+    Estrae i valori di EXPORT_HEADERS da una riga.
+    Per sqlite3.Row usa gli indici (risolti una volta) invece della ricerca per nome.
+    """
+    if isinstance(sample_row, sqlite3.Row):
+        keys = sample_row.keys()
+        return itemgetter(*[keys.index(h) for h in EXPORT_HEADERS])
+    return itemgetter(*EXPORT_HEADERS)
+
+
+def _format_batch(rows, getter) -> list:
+    formatters = COLUMN_FORMATTERS
+    return [
+        [fmt(v) for fmt, v in zip(formatters, getter(r))]
+        for r in rows
     ]
 
-    with path.open("w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f, delimiter=';')
-        writer.writerow(header_label)
-        for r in rows:
-            writer.writerow([
-                csv_value(r[h], h) for h in headers
-            ])
+
+def _batched(rows: Iterable, size: int):
+    batch = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _output_mode(path: Path) -> int:
+    try:
+        return stat.S_IMODE(path.stat().st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def _atomic_output(filepath: str):
+    """
+    Fornisce un percorso temporaneo nella stessa cartella della destinazione e lo
+    rinomina solo se il blocco termina senza errori: in caso di errore o
+    annullamento la destinazione resta com'era.
+    """
+    path = Path(filepath)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    os.close(fd)
+    try:
+        yield tmp_name
+        # mkstemp crea il file con 0600: l'export va dato ad altri, quindi stessi
+        # permessi di un open() normale (o quelli del file che sostituisce)
+        os.chmod(tmp_name, _output_mode(path))
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _write_csv_stream(f, pages, total, progress, is_cancelled) -> int:
+    written = 0
+    getter = None
+    writer = csv.writer(f, delimiter=';')
+    writer.writerow(EXPORT_LABELS)
+    for page in pages:
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+        if not page:
+            continue
+        if getter is None:
+            getter = _row_getter(page[0])
+        writer.writerows(_format_batch(page, getter))
+        written += len(page)
+        if progress:
+            progress(written, total)
+    return written
+
+
+def export_pages_to_csv(
+    pages: Iterable[list],
+    filepath: str,
+    *,
+    total: Optional[int] = None,
+    progress: Optional[ProgressFn] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> int:
+    """
+    Scrive il CSV consumando le righe una pagina alla volta (es. db.iter_registry_pages):
+    in memoria c'è al massimo una pagina. Ritorna il numero di righe scritte.
+
+    Il file viene scritto in un temporaneo nella stessa cartella e rinominato solo
+    a export completato: in caso di errore o annullamento (is_cancelled() True,
+    solleva ExportCancelled) la destinazione resta com'era.
+    """
+    with _atomic_output(filepath) as tmp:
+        with open(tmp, "w", newline="", encoding="utf-8-sig") as f:
+            return _write_csv_stream(f, pages, total, progress, is_cancelled)
+
+
+def export_rows_to_csv(rows, filepath: str, *, progress: Optional[ProgressFn] = None, batch_size: int = 1000) -> int:
+    total = len(rows) if hasattr(rows, "__len__") else None
+    return export_pages_to_csv(_batched(rows, batch_size), filepath, total=total, progress=progress)
+
+
+def export_pages_to_csv_gz(pages, filepath, *, total=None, progress=None, is_cancelled=None) -> int:
+    with _atomic_output(filepath) as tmp:
+        with gzip.open(tmp, "wt", newline="", encoding="utf-8-sig", compresslevel=6) as f:
+            return _write_csv_stream(f, pages, total, progress, is_cancelled)
+
+
+def _zstd_module():
+    # Python >= 3.14 ha zstd nella libreria standard, altrimenti il pacchetto 'zstandard'
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def export_pages_to_csv_zst(pages, filepath, *, total=None, progress=None, is_cancelled=None) -> int:
+    zstd = _zstd_module()
+    if zstd is None:
+        raise RuntimeError("Compressione zstd non disponibile (serve Python 3.14 o il pacchetto 'zstandard').")
+    with _atomic_output(filepath) as tmp:
+        with zstd.open(tmp, "wt", newline="", encoding="utf-8-sig") as f:
+            return _write_csv_stream(f, pages, total, progress, is_cancelled)
+
+
+# ---------- export incrementale (registro modifiche) ----------
+
+def export_changes_to_jsonl(
+    pages: Iterable[list],
+    filepath: str,
+    *,
+    progress: Optional[ProgressFn] = None,
+    is_cancelled: Optional[Callable[[], bool]] = None,
+) -> Tuple[int, int]:
+    """
+    Scrive le modifiche (pagine di db.iter_changes) in JSON lines:
+    {"seq": ..., "op": "upsert", <colonne registry>} oppure {"seq": ..., "op": "delete", "taratassi": ...}.
+    Ritorna (righe scritte, seq dell'ultima modifica esportata, 0 se nessuna).
+    """
+    written = 0
+    last_seq = 0
+    with _atomic_output(filepath) as tmp:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for page in pages:
+                if is_cancelled and is_cancelled():
+                    raise ExportCancelled()
+                lines = []
+                for r in page:
+                    if r["op"] == "D":
+                        rec = {"seq": r["seq"], "op": "delete", "taratassi": r["taratassi"]}
+                    else:
+                        rec = {"seq": r["seq"], "op": "upsert"}
+                        rec.update((h, r[h]) for h in EXPORT_HEADERS)
+                    lines.append(json.dumps(rec, ensure_ascii=False))
+                    last_seq = r["seq"]
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                written += len(page)
+                if progress:
+                    progress(written, None)
+    return written, last_seq
+
+
+# ---------- formati colonnari (solo se pyarrow è installato) ----------
+
+def _pyarrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    types = {
+        "consent": pa.bool_(), "witnessed": pa.bool_(),
+        "declared_age": pa.int64(), "age_estimation": pa.int64(),
+        "muac": pa.float64(), "weight": pa.float64(), "height": pa.float64(), "whz": pa.float64(),
+        "created_at": pa.timestamp("s"),
+    }
+    return pa.schema([
+        pa.field(label, types.get(h, pa.string()))
+        for h, label in zip(EXPORT_HEADERS, EXPORT_LABELS)
+    ])
+
+
+def _arrow_batches(pages, schema, total, progress, is_cancelled):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    written = 0
+    getter = None
+    ts_index = EXPORT_HEADERS.index("created_at")
+    bool_indexes = {i for i, h in enumerate(EXPORT_HEADERS) if h in BOOLEAN_FIELDS}
+    for page in pages:
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+        if not page:
+            continue
+        if getter is None:
+            getter = _row_getter(page[0])
+        columns = list(zip(*map(getter, page)))
+        arrays = []
+        for i, (col, field) in enumerate(zip(columns, schema)):
+            if i == ts_index:
+                arrays.append(pc.strptime(pa.array(col, pa.string()), format=DATETIME_FORMAT, unit="s"))
+            elif i in bool_indexes:
+                arrays.append(pa.array([None if v is None else v == 1 for v in col], pa.bool_()))
+            else:
+                arrays.append(pa.array(col, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+        written += len(page)
+        if progress:
+            progress(written, total)
+
+
+def export_pages_to_parquet(pages, filepath, *, total=None, progress=None, is_cancelled=None) -> int:
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema()
+    written = 0
+    with _atomic_output(filepath) as tmp:
+        with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+            for batch in _arrow_batches(pages, schema, total, progress, is_cancelled):
+                writer.write_batch(batch)
+                written += batch.num_rows
+    return written
+
+
+def export_pages_to_arrow(pages, filepath, *, total=None, progress=None, is_cancelled=None) -> int:
+    import pyarrow as pa
+
+    schema = _arrow_schema()
+    written = 0
+    with _atomic_output(filepath) as tmp:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in _arrow_batches(pages, schema, total, progress, is_cancelled):
+                writer.write_batch(batch)
+                written += batch.num_rows
+    return written
+
+
+# ---------- registro dei formati ----------
+
+@dataclass(frozen=True)
+class Exporter:
+    name: str
+    label: str          # descrizione mostrata nella finestra di salvataggio
+    suffix: str         # estensione del file, es. ".csv.gz"
+    write: Callable[..., int]   # write(pages, filepath, *, total, progress, is_cancelled)
+    available: Callable[[], bool] = lambda: True
+
+    @property
+    def file_filter(self) -> str:
+        return f"{self.label} (*{self.suffix})"
+
+
+EXPORTERS: Dict[str, Exporter] = {}
+
+
+def register_exporter(exporter: Exporter) -> None:
+    EXPORTERS[exporter.name] = exporter
+
+
+def available_exporters() -> list[Exporter]:
+    return [e for e in EXPORTERS.values() if e.available()]
+
+
+def get_exporter(name: str) -> Exporter:
+    exporter = EXPORTERS.get(name)
+    if exporter is None:
+        raise ValueError(f"Formato di export sconosciuto: {name}")
+    if not exporter.available():
+        raise RuntimeError(f"Formato di export non disponibile su questa installazione: {name}")
+    return exporter
+
+
+def export_pages(fmt: str, pages: Iterable[list], filepath: str, **kwargs) -> int:
+    """Esporta le pagine nel formato registrato `fmt` (es. 'csv', 'csv.gz', 'parquet')."""
+    return get_exporter(fmt).write(pages, filepath, **kwargs)
+
+
+register_exporter(Exporter("csv", "CSV", ".csv", export_pages_to_csv))
+register_exporter(Exporter("csv.gz", "CSV compresso gzip", ".csv.gz", export_pages_to_csv_gz))
+register_exporter(Exporter(
+    "csv.zst", "CSV compresso zstd", ".csv.zst", export_pages_to_csv_zst,
+    available=lambda: _zstd_module() is not None,
+))
+register_exporter(Exporter("parquet", "Parquet", ".parquet", export_pages_to_parquet, available=_pyarrow_available))
+register_exporter(Exporter("arrow", "Arrow IPC", ".arrow", export_pages_to_arrow, available=_pyarrow_available))
@@ -0,0 +1,500 @@
+"""
+Tab "Nuova compilazione" e dialog di modifica: il form del questionario con il calcolo del WHZ.
+"""
+import sqlite3
+from typing import Dict, Any, Tuple, Optional
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QCheckBox,
+    QDoubleSpinBox, QSpinBox, QPushButton, QMessageBox, QDialog
+)
+
+from db import get_registry
+from whz import CLASS_LABELS, CLASS_MODERATE, CLASS_NONE, classify, whz_for
+from write_queue import writer
+
+YES_NO_NS = ["-", "Sì", "No", "Non so"]
+YES_NO = ["-", 'Sì', 'No']
+VILLAGGI = ["-", "Befandefa", "Andavadoaka"]
+SESSI = ["-", "Maschio", "Femmina"]
+
+def bool_to_int(v: bool) -> int:
+    return 1 if v else 0
+
+
+class RegistryForm(QWidget):
+    """
+    Widget riusabile: stessa UI per creazione e modifica.
+    Contiene:
+      - costruzione UI
+      - calcolo WHZ automatico
+      - clear()
+      - get_data()
+      - set_data(row)
+      - validate(data)
+    """
+    def __init__(self, *, taratassi_readonly: bool = False, parent=None):
+        super().__init__(parent)
+        self._build()
+        self.set_taratassi_readonly(taratassi_readonly)
+
+    # ---------- UI helpers ----------
+    def _row(self, label: str, widget: QWidget) -> QHBoxLayout:
+        r = QHBoxLayout()
+        r.addWidget(QLabel(label))
+        r.addWidget(widget, 1)
+        return r
+
+
+    def set_taratassi_readonly(self, readonly: bool) -> None:
+        self.taratassi.setReadOnly(readonly)
+        # opzionale: rendilo anche visivamente "non editabile"
+        # self.taratassi.setStyleSheet("background:#f3f3f3;" if readonly else "")
+
+    # ---------- WHZ logic (spostata da FormTab) ----------
+    def _get_age(self) -> int:
+        dichiarata = int(self.declared_age.value())
+        stimata = int(self.age_estimation.value())
+        return dichiarata
+
+    def _update_whz_status(self):
+        text = (self.whz.text() or "").strip()
+        try:
+            v = float(text.replace(",", "."))
+        except ValueError:
+            v = None
+
+        # stessa regola dei contatori (whz.classify): MUAC 0 = non misurato
+        cls = classify(v, self.muac.value(), self._get_age())
+        if cls is None:
+            self.whz_status.setText("")
+            self.whz_status.setStyleSheet("")
+            return
+
+        color = 'inherit'
+        txt = CLASS_LABELS[cls]
+        if cls == CLASS_NONE:
+            bg_color = "2fb538"
+        elif cls == CLASS_MODERATE:
+            color = '#000'
+            bg_color = "cedb3b"
+        else:
+            bg_color = "e03d3a"
+
+        style = f"""
+                QLineEdit {{
+                    background-color: #{bg_color};
+                    color: {color};
+                    font-weight: 600;
+                    border: 1px solid #999;
+                    border-radius: 6px;
+                    padding: 4px;
+                }}
+                """
+
+        self.whz_status.setText(txt)
+        self.whz_status.setStyleSheet(style)
+
+    def _update_whz_value(self) -> None:
+        try:
+            whz = whz_for(float(self.weight.value()), self.height.value(), self.gender.currentText(), self._get_age())
+            if whz is None:
+                self.whz.setText("")
+                return
+
+            whz = round(whz, 1)
+            self.whz.setText(str(whz))
+            self._update_whz_status()
+        except Exception:
+            # se height fuori range LMS, ecc.
+            self.whz.setText("0")
+
+    def _force_uppercase(self, text):
+        widget = self.sender()
+        if widget is None:
+            return
+
+        upper = text.upper()
+        if text != upper:
+            widget.setText(upper)
+
+    # ---------- Build UI ----------
+    def _build(self) -> None:
+        lay = QVBoxLayout(self)
+
+        # Taratassi
+        self.taratassi = QLineEdit()
+        self.taratassi.textChanged.connect(self._force_uppercase)
+        lay.addLayout(self._row("N° Taratassi", self.taratassi))
+
+        # village
+        self.village = QComboBox()
+        self.village.addItems(VILLAGGI)
+        lay.addLayout(self._row("Villaggio", self.village))
+
+        # Consensi
+        self.consent = QCheckBox("Sì")
+        self.witnessed = QCheckBox("Sì")
+        self.consent.setChecked(True)
+        self.witnessed.setChecked(True)
+        lay.addWidget(QLabel("Spiegazione consenso informato"))
+        lay.addWidget(self.consent)
+        lay.addWidget(QLabel("Consenso orale con testimone"))
+        lay.addWidget(self.witnessed)
+
+        # Età mesi dichiarata
+        self.declared_age = QSpinBox()
+        self.declared_age.setRange(0, 2400)
+        self.declared_age.editingFinished.connect(self._update_whz_value)
+        lay.addLayout(self._row("Età in mesi dichiarata", self.declared_age))
+
+        # Età mesi stimata
+        self.age_estimation = QSpinBox()
+        self.age_estimation.setRange(0, 2400)
+        self.age_estimation.editingFinished.connect(self._update_whz_value)
+        lay.addLayout(self._row("Età in mesi stimata", self.age_estimation))
+
+        # gender
+        self.gender = QComboBox()
+        self.gender.addItems(SESSI)
+        self.gender.currentIndexChanged.connect(self._update_whz_value)
+        lay.addLayout(self._row("Sesso", self.gender))
+
+        # Misure
+        self.muac = QDoubleSpinBox()
+        self.muac.setRange(0, 1000)
+        self.muac.setDecimals(2)
+        self.muac.setSingleStep(0.1)
+        self.muac.editingFinished.connect(self._update_whz_status)
+        lay.addLayout(self._row("Circonferenza braccio SX in cm (MUAC)", self.muac))
+
+        self.weight = QDoubleSpinBox()
+        self.weight.setRange(0, 1000)
+        self.weight.setDecimals(2)
+        self.weight.setSingleStep(0.1)
+        self.weight.editingFinished.connect(self._update_whz_value)
+        lay.addLayout(self._row("Peso (Kg)", self.weight))
+
+        self.height = QDoubleSpinBox()
+        self.height.setRange(0, 300)
+        self.height.setDecimals(1)   # uguale alla creazione
+        self.height.setSingleStep(0.5)
+        self.height.editingFinished.connect(self._update_whz_value)
+        lay.addLayout(self._row("Altezza (cm)", self.height))
+
+        self.whz = QLineEdit()
+        self.whz.setReadOnly(True)
+        self.whz.setPlaceholderText("Viene calcolato automaticamente")
+       # lay.addLayout(self._row("Indice WHZ", self.whz))
+
+        # nuovo campo dinamico
+        self.whz_status = QLineEdit()
+        self.whz_status.setReadOnly(True)
+        self.whz_status.setAlignment(Qt.AlignCenter)
+        self.whz_status.setFixedWidth(220)  # scegli tu
+        self.whz_status.setPlaceholderText("Livello Malnutrizione")
+
+        # container riga: WHZ + Status
+        whz_row_widget = QWidget()
+        whz_row_lay = QHBoxLayout(whz_row_widget)
+        whz_row_lay.setContentsMargins(0, 0, 0, 0)
+        whz_row_lay.setSpacing(10)
+        whz_row_lay.addWidget(self.whz, 1)  # prende spazio
+        whz_row_lay.addWidget(self.whz_status, 0)  # fisso
+
+        lay.addLayout(self._row("Indice WHZ", whz_row_widget))
+
+        # Domande (uguali alla creazione)
+        self.q1 = QComboBox(); self.q1.addItems(YES_NO_NS)
+        self.q2 = QComboBox(); self.q2.addItems(YES_NO)
+        self.q3 = QComboBox(); self.q3.addItems(YES_NO_NS)
+        self.q4 = QComboBox(); self.q4.addItems(YES_NO_NS)
+        self.q5 = QComboBox(); self.q5.addItems(YES_NO)
+        self.q6 = QComboBox(); self.q6.addItems(YES_NO)
+
+        lay.addLayout(self._row("Negli ultimi 7 giorni ha mangiato meno/rifiutato cibo?", self.q1))
+        lay.addLayout(self._row("Ieri ha mangiato almeno 3 volte (oltre al latte)?", self.q2))
+        lay.addLayout(self._row("Diarrea ultime 2 settimane?", self.q3))
+        lay.addLayout(self._row("Febbre ultime 2 settimane?", self.q4))
+        lay.addLayout(self._row("Prende ancora latte materno?", self.q5))
+        lay.addLayout(self._row('Presenta edemi declivi?', self.q6))
+
+        lay.addStretch(1)
+
+    # ---------- Data binding ----------
+    def clear(self) -> None:
+        self.taratassi.setText("")
+        self.village.setCurrentIndex(0)
+        self.consent.setChecked(False)
+        self.witnessed.setChecked(False)
+        self.declared_age.setValue(0)
+        self.age_estimation.setValue(0)
+        self.gender.setCurrentIndex(0)
+        self.muac.setValue(0)
+        self.weight.setValue(0)
+        self.height.setValue(0)
+        self.q1.setCurrentIndex(0)
+        self.q2.setCurrentIndex(0)
+        self.q3.setCurrentIndex(0)
+        self.q4.setCurrentIndex(0)
+        self.q5.setCurrentIndex(0)
+        self.q6.setCurrentIndex(0)
+        self.whz.setText("")
+        self.whz_status.clear()
+        self.whz_status.setStyleSheet('')
+
+    def get_data(self) -> Dict[str, Any]:
+        # Forza ricalcolo WHZ prima di leggere il valore
+        self._update_whz_value()
+
+        return {
+            "taratassi": self.taratassi.text().strip(),
+            "village": self.village.currentText(),
+            "consent": bool_to_int(self.consent.isChecked()),
+            "witnessed": bool_to_int(self.witnessed.isChecked()),
+            "declared_age": int(self.declared_age.value()),
+            "age_estimation": int(self.age_estimation.value()),
+            "gender": self.gender.currentText(),
+            "muac": float(self.muac.value()) if self.muac.value() != 0 else None,
+            "weight": float(self.weight.value()) if self.weight.value() != 0 else None,
+            "height": float(self.height.value()) if self.height.value() != 0 else None,
+            "whz": float(self.whz.text()) if self.whz.text() else None,
+            "q1": self.q1.currentText(),
+            "q2": self.q2.currentText(),
+            "q3": self.q3.currentText(),
+            "q4": self.q4.currentText(),
+            "q5": self.q5.currentText(),
+            "q6": self.q5.currentText(),
+        }
+
+    def set_data(self, row: Dict[str, Any]) -> None:
+        # blocca segnali se vuoi evitare calcoli WHZ intermedi mentre setti valori
+        self.taratassi.setText(row.get("taratassi", "") or "")
+        self.village.setCurrentText(row.get("village", "-") or "-")
+        self.consent.setChecked((row.get("consent") or 0) == 1)
+        self.witnessed.setChecked((row.get("witnessed") or 0) == 1)
+
+        self.declared_age.setValue(int(row.get("declared_age") or 0))
+        self.age_estimation.setValue(int(row.get("age_estimation") or 0))  # <-- fix bug: era declared_age
+        self.gender.setCurrentText(row.get("gender", "-") or "-")
+
+        self.muac.setValue(float(row.get("muac") or 0))
+        self.weight.setValue(float(row.get("weight") or 0))
+        self.height.setValue(float(row.get("height") or 0))
+
+        self.q1.setCurrentText(row.get("q1", "-") or "-")
+        self.q2.setCurrentText(row.get("q2", "-") or "-")
+        self.q3.setCurrentText(row.get("q3", "-") or "-")
+        self.q4.setCurrentText(row.get("q4", "-") or "-")
+        self.q5.setCurrentText(row.get("q5", "-") or "-")
+        self.q6.setCurrentText(row.get("q6", "-") or "-")
+
+        # ricalcola WHZ e, se non calcolabile, mostra quello salvato (se presente)
+        self._update_whz_value()
+        if not self.whz.text() and row.get("whz") is not None:
+            self.whz.setText(str(row["whz"]))
+
+    # ---------- Validation ----------
+    def validate(self, data: Optional[Dict[str, Any]] = None, *, require_taratassi: bool = True) -> Tuple[bool, str]:
+        if data is None:
+            data = self.get_data()
+
+        labels = {
+            "taratassi": "N° Taratassi",
+            "village": "Villaggio",
+            "consent": "Spiegazione consenso informato",
+            "witnessed": "Consenso orale con testimone",
+            "declared_age": "Età in mesi dichiarata",
+            "age_estimation": "Età in mesi stimata",
+            "gender": "Sesso",
+            "weight": "Peso",
+            "height": "Altezza",
+            "whz": "WHZ",
+        }
+
+        # ordine “umano” (simile al tuo)
+        ordered_keys = [
+            "taratassi", "village",
+            "consent", "witnessed",
+            "declared_age", "age_estimation", "gender",
+            "weight", "height", "whz",
+            "q1", "q2", "q3", "q4", "q5"
+        ]
+
+        for key in ordered_keys:
+            if key == "taratassi" and not require_taratassi:
+                continue
+
+            value = data.get(key)
+
+            missing = False
+            if key in ("taratassi", "village", "gender", "q1", "q2", "q3", "q4", "q5"):
+                missing = (value is None) or (value == "") or (value == "-")
+            elif key in ("consent", "witnessed"):
+                missing = (value != 1)  # devono essere spuntati
+            elif key in ("declared_age", "age_estimation"):
+                missing = (value is None) or (int(value) <= 0)
+            elif key == "whz":
+                # IMPORTANT: whz=0.0 è valido, quindi controlla solo None
+                missing = (value is None)
+            else:
+                # muac/weight/height: se 0 li trasformiamo in None, quindi basta None
+                missing = (value is None)
+
+            if missing:
+                if key.startswith("q"):
+                    return False, f"Domanda {key[1:]} mancante"
+                return False, f"{labels.get(key, key)} è obbligatorio."
+
+        return True, ""
+
+class FormTab(QWidget):
+    def __init__(self, on_saved_callback=None):
+        super().__init__()
+        self.on_saved_callback = on_saved_callback
+        self._pending: Dict[int, Dict[str, Any]] = {}   # id richiesta -> dati, finché non arriva l'esito
+        self._build()
+        w = writer()
+        w.saved.connect(self._on_written)
+        w.failed.connect(self._on_write_failed)
+
+    def _build(self):
+        lay = QVBoxLayout(self)
+
+        # form riusabile
+        self.form = RegistryForm(taratassi_readonly=False)
+        lay.addWidget(self.form, 1)
+
+        # esito degli ultimi salvataggi, senza finestre da chiudere
+        self.lbl_status = QLabel("")
+        lay.addWidget(self.lbl_status)
+
+        # Pulsanti
+        btns = QHBoxLayout()
+        self.save_btn = QPushButton("Salva compilazione")
+        self.clear_btn = QPushButton("Svuota form")
+        btns.addWidget(self.save_btn)
+        btns.addWidget(self.clear_btn)
+        lay.addLayout(btns)
+
+        self.save_btn.clicked.connect(self._save)
+        self.clear_btn.clicked.connect(self.form.clear)
+
+    def _save(self):
+        data = self.form.get_data()
+        ok, msg = self.form.validate(data, require_taratassi=True)
+        if not ok:
+            QMessageBox.warning(self, "Errore", msg)
+            return
+
+        # si passa subito al bambino successivo: l'esito arriva da _on_written / _on_write_failed
+        request_id = writer().submit("insert", data["taratassi"], data)
+        self._pending[request_id] = data
+        self.lbl_status.setText(f"Salvataggio di {data['taratassi']}...")
+        self.form.clear()
+
+    def _on_written(self, request_id: int, op: str, taratassi: str):
+        if self._pending.pop(request_id, None) is None:
+            return   # richiesta di qualcun altro (es. EditDialog)
+        self.lbl_status.setText(f"Compilazione {taratassi} salvata correttamente.")
+        if self.on_saved_callback:
+            self.on_saved_callback()
+
+    def _on_write_failed(self, request_id: int, op: str, taratassi: str, error):
+        data = self._pending.pop(request_id, None)
+        if data is None:
+            return
+        if isinstance(error, sqlite3.IntegrityError) and "UNIQUE" in str(error):
+            msg = "N° Taratassi già esistente."
+        else:
+            msg = str(error)
+        self.lbl_status.setText(f"Compilazione {taratassi} NON salvata.")
+
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Critical)
+        box.setWindowTitle("Errore salvataggio")
+        box.setText(f"Compilazione {taratassi} NON salvata:\n{msg}")
+        restore_btn = box.addButton("Riporta nel form", QMessageBox.ActionRole)
+        box.addButton("Chiudi", QMessageBox.RejectRole)
+        box.exec()
+        if box.clickedButton() == restore_btn:
+            self.form.set_data(data)
+
+class EditDialog(QDialog):
+    def __init__(self, taratassi: str, parent=None):
+        super().__init__(parent)
+        self.taratassi_value = taratassi
+        self.setWindowTitle(f"Modifica: {taratassi}")
+        self.resize(700, 600)
+        self._build()
+        self._load()
+
+    def _build(self):
+        lay = QVBoxLayout(self)
+
+        # stesso form della creazione, ma taratassi in sola lettura
+        self.form = RegistryForm(taratassi_readonly=True, parent=self)
+        lay.addWidget(self.form, 1)
+
+        btns = QHBoxLayout()
+        self.save_btn = QPushButton("Salva modifiche")
+        self.cancel_btn = QPushButton("Annulla")
+        btns.addWidget(self.save_btn)
+        btns.addWidget(self.cancel_btn)
+        lay.addLayout(btns)
+
+        self.save_btn.clicked.connect(self._save)
+        self.cancel_btn.clicked.connect(self.reject)
+
+        self._request_id = None
+        self._writer = writer()
+        self._writer.saved.connect(self._on_written)
+        self._writer.failed.connect(self._on_write_failed)
+
+    def done(self, result: int):
+        # il thread di scrittura vive quanto l'app: senza disconnect il dialog
+        # resterebbe collegato (e in memoria) dopo la chiusura
+        if self._writer is not None:
+            self._writer.saved.disconnect(self._on_written)
+            self._writer.failed.disconnect(self._on_write_failed)
+            self._writer = None
+        super().done(result)
+
+    def _load(self):
+        row = get_registry(self.taratassi_value)
+        if not row:
+            QMessageBox.critical(self, "Errore", "Record non trovato.")
+            self.reject()
+            return
+
+        self.form.set_data(row)
+
+    def _save(self):
+        full_data = self.form.get_data()
+
+        ok, msg = self.form.validate(full_data, require_taratassi=True)
+        if not ok:
+            QMessageBox.warning(self, "Errore", msg)
+            return
+
+        # taratassi non va aggiornato (chiave), quindi lo togliamo dall'update
+        data = dict(full_data)
+        data.pop("taratassi", None)
+
+        # il dialog resta aperto finché il thread di scrittura non conferma
+        self.save_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
+        self._request_id = writer().submit("update", self.taratassi_value, data)
+
+    def _on_written(self, request_id: int, op: str, taratassi: str):
+        if request_id == self._request_id:
+            self.accept()
+
+    def _on_write_failed(self, request_id: int, op: str, taratassi: str, error):
+        if request_id != self._request_id:
+            return
+        self._request_id = None
+        self.save_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(True)
+        QMessageBox.critical(self, "Errore salvataggio", str(error))
@@ -0,0 +1,368 @@
+"""
+Import massivo in registry da file prodotti dall'app (o compatibili):
+
+- CSV ';' come quello di export_utils (intestazioni "umane" o nomi colonna DB)
+- JSON lines, un oggetto per riga con i nomi colonna DB (o le etichette CSV)
+
+Le righe vengono lette e validate in streaming, inserite a blocchi con
+executemany dentro transazioni grandi; errori e conflitti (taratassi già presente)
+vengono annotati riga per riga senza interrompere l'import.
+"""
+import csv
+import json
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from db import get_conn, invalidate_records
+from export_utils import DATETIME_FORMAT, EXPORT_HEADERS, EXPORT_LABELS
+from whz import whz_for
+
+VILLAGES = {"Andavadoaka", "Befandefa"}
+GENDERS = {"Maschio", "Femmina"}
+ANSWERS = {"Sì", "No", "Non so"}
+QUESTIONS = ("q1", "q2", "q3", "q4", "q5", "q6")
+
+IMPORT_COLUMNS = EXPORT_HEADERS   # stesse colonne (e stesso ordine) dell'export
+BATCH_SIZE = 5000
+
+# etichetta CSV o nome colonna -> nome colonna
+_FIELD_NAMES = {label: name for name, label in zip(EXPORT_HEADERS, EXPORT_LABELS)}
+_FIELD_NAMES.update({name: name for name in EXPORT_HEADERS})
+
+_TRUE = {"si", "sì", "1", "true", "yes"}
+_FALSE = {"no", "0", "false"}
+
+# progress(righe_lette)
+ProgressFn = Callable[[int], None]
+
+
+@dataclass
+class ImportIssue:
+    line: int                  # riga nel file (1 = prima riga dati)
+    taratassi: Optional[str]
+    message: str
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    replaced: int = 0
+    deleted: int = 0
+    conflicts: List[ImportIssue] = field(default_factory=list)
+    errors: List[ImportIssue] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return (
+            f"Righe lette: {self.read}, inserite: {self.inserted}, sostituite: {self.replaced}, "
+            f"eliminate: {self.deleted}, "
+            f"conflitti: {len(self.conflicts)}, errori: {len(self.errors)}"
+        )
+
+
+# ---------- lettura ----------
+
+def iter_csv_records(filepath: str) -> Iterator[Tuple[int, Dict]]:
+    with Path(filepath).open("r", newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=';')
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [_FIELD_NAMES.get(h.strip()) for h in header]
+        for line, values in enumerate(reader, start=1):
+            if not any(v.strip() for v in values):
+                continue
+            yield line, {n: v for n, v in zip(names, values) if n}
+
+
+def iter_jsonl_records(filepath: str) -> Iterator[Tuple[int, Dict]]:
+    with Path(filepath).open("r", encoding="utf-8-sig") as f:
+        for line, text in enumerate(f, start=1):
+            text = text.strip()
+            if not text:
+                continue
+            try:
+                obj = json.loads(text)
+            except json.JSONDecodeError as e:
+                # lo segnala normalize_record come errore della riga
+                obj = {"__error__": f"JSON non valido: {e.msg}"}
+            if not isinstance(obj, dict):
+                obj = {"__error__": "la riga non è un oggetto JSON"}
+            yield line, {_FIELD_NAMES.get(k, k): v for k, v in obj.items()}
+
+
+def iter_records(filepath: str) -> Iterator[Tuple[int, Dict]]:
+    suffix = Path(filepath).suffix.lower()
+    if suffix in (".jsonl", ".ndjson"):
+        return iter_jsonl_records(filepath)
+    return iter_csv_records(filepath)
+
+
+# ---------- validazione ----------
+
+def _blank(v) -> bool:
+    return v is None or (isinstance(v, str) and v.strip() in ("", "-"))
+
+
+def _to_bool(v, name: str) -> int:
+    if isinstance(v, bool):
+        return int(v)
+    s = str(v).strip().lower()
+    if s in _TRUE:
+        return 1
+    if s in _FALSE:
+        return 0
+    raise ValueError(f"{name}: valore non valido '{v}'")
+
+
+def _to_int(v, name: str) -> int:
+    try:
+        n = int(float(str(v).replace(",", ".")))
+    except (ValueError, OverflowError):   # OverflowError: int(float("inf"))
+        raise ValueError(f"{name}: numero non valido '{v}'")
+    if n < 0:
+        raise ValueError(f"{name}: non può essere negativo")
+    return n
+
+
+def _to_float(v, name: str) -> Optional[float]:
+    if _blank(v):
+        return None
+    try:
+        value = float(str(v).replace(",", "."))
+    except ValueError:
+        raise ValueError(f"{name}: numero non valido '{v}'")
+    if not math.isfinite(value):   # "inf", "nan"
+        raise ValueError(f"{name}: numero non valido '{v}'")
+    return value
+
+
+def _to_datetime(v, name: str) -> str:
+    try:
+        return datetime.strptime(str(v).strip(), DATETIME_FORMAT).strftime(DATETIME_FORMAT)
+    except ValueError:
+        raise ValueError(f"{name}: data non valida '{v}' (formato AAAA-MM-GG hh:mm:ss)")
+
+
+def normalize_record(raw: Dict, *, lenient: bool = False) -> Dict:
+    """
+    Converte una riga letta dal file nei valori da inserire in registry,
+    applicando gli stessi vincoli della tabella e del form (RegistryForm.validate:
+    consenso e testimone, età > 0, WHZ calcolabile). Con lenient=True restano solo
+    quelli della tabella, per recuperare dati raccolti fuori dall'app. Solleva ValueError.
+    """
+    if "__error__" in raw:
+        raise ValueError(raw["__error__"])
+
+    taratassi = str(raw.get("taratassi") or "").strip().upper()
+    if not taratassi:
+        raise ValueError("N° Taratassi mancante")
+
+    data = {"taratassi": taratassi}
+
+    village = str(raw.get("village") or "").strip()
+    if village not in VILLAGES:
+        raise ValueError(f"Villaggio non valido '{village}'")
+    data["village"] = village
+
+    gender = str(raw.get("gender") or "").strip()
+    if gender not in GENDERS:
+        raise ValueError(f"Sesso non valido '{gender}'")
+    data["gender"] = gender
+
+    for name in ("consent", "witnessed"):
+        if _blank(raw.get(name)):
+            raise ValueError(f"{name} mancante")
+        data[name] = _to_bool(raw[name], name)
+        if not lenient and data[name] != 1:
+            raise ValueError(f"{name}: consenso non registrato (0)")
+
+    for name in ("declared_age", "age_estimation"):
+        if _blank(raw.get(name)):
+            raise ValueError(f"{name} mancante")
+        data[name] = _to_int(raw[name], name)
+        if not lenient and data[name] <= 0:
+            raise ValueError(f"{name}: deve essere maggiore di 0")
+
+    for name in ("weight", "height"):
+        value = _to_float(raw.get(name), name)
+        if not value or value <= 0:
+            raise ValueError(f"{name} mancante o non valido")
+        data[name] = value
+    # come insert_registry: MUAC assente = 0
+    data["muac"] = _to_float(raw.get("muac"), "muac") or 0.0
+
+    whz = _to_float(raw.get("whz"), "whz")
+    if whz is None:
+        whz = whz_for(data["weight"], data["height"], gender, data["declared_age"])
+        whz = round(whz, 1) if whz is not None else None
+    if whz is None and not lenient:
+        raise ValueError("whz: non calcolabile da peso, altezza ed età")
+    data["whz"] = whz
+
+    for q in QUESTIONS:
+        answer = raw.get(q)
+        if _blank(answer):
+            # q6 è stata aggiunta dopo (migrazione 1 -> 2), stesso default
+            if q == "q6":
+                answer = "Non so"
+            else:
+                raise ValueError(f"Domanda {q[1:]} mancante")
+        answer = str(answer).strip()
+        if answer == "Si":
+            answer = "Sì"
+        if answer not in ANSWERS:
+            raise ValueError(f"Domanda {q[1:]}: risposta non valida '{answer}'")
+        data[q] = answer
+
+    created_at = raw.get("created_at")
+    data["created_at"] = None if _blank(created_at) else _to_datetime(created_at, "created_at")
+    return data
+
+
+# ---------- inserimento ----------
+
+_COLS = ", ".join(IMPORT_COLUMNS)
+_VALUES = ", ".join(
+    "COALESCE(:created_at, datetime('now'))" if c == "created_at" else f":{c}" for c in IMPORT_COLUMNS
+)
+INSERT_SQL = f"INSERT INTO registry ({_COLS}) VALUES ({_VALUES})"
+# senza created_at nel file la riga esistente tiene la sua data: datetime('now')
+# la sposterebbe nella paginazione, nei contatori per giorno e nei merge "latest"
+REPLACE_SQL = INSERT_SQL + " ON CONFLICT(taratassi) DO UPDATE SET " + ", ".join(
+    "created_at = COALESCE(:created_at, registry.created_at)" if c == "created_at" else f"{c} = excluded.{c}"
+    for c in IMPORT_COLUMNS if c != "taratassi"
+)
+
+
+def _existing_keys(conn: sqlite3.Connection, keys: List[str]) -> set:
+    found = set()
+    # a blocchi per restare sotto il limite di parametri di SQLite
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        marks = ",".join("?" * len(chunk))
+        found.update(r[0] for r in conn.execute(
+            f"SELECT taratassi FROM registry WHERE taratassi IN ({marks})", chunk
+        ))
+    return found
+
+
+def _flush(conn: sqlite3.Connection, batch: List[Tuple[int, Dict]], replace: bool, report: ImportReport) -> None:
+    if not batch:
+        return
+
+    existing = _existing_keys(conn, [d["taratassi"] for _, d in batch])
+    seen = set()
+    rows = []
+    for line, data in batch:
+        key = data["taratassi"]
+        if key in seen:
+            report.conflicts.append(ImportIssue(line, key, "N° Taratassi duplicato nel file"))
+            continue
+        seen.add(key)
+        if key in existing and not replace:
+            report.conflicts.append(ImportIssue(line, key, "N° Taratassi già esistente"))
+            continue
+        rows.append((line, data))
+
+    sql = REPLACE_SQL if replace else INSERT_SQL
+    conn.execute("SAVEPOINT import_batch")
+    try:
+        conn.executemany(sql, [d for _, d in rows])
+        conn.execute("RELEASE import_batch")
+    except sqlite3.DatabaseError:
+        # un vincolo ha bocciato il blocco: si riprova riga per riga per isolare il colpevole
+        conn.execute("ROLLBACK TO import_batch")
+        conn.execute("RELEASE import_batch")
+        ok = []
+        for line, data in rows:
+            try:
+                conn.execute(sql, data)
+                ok.append((line, data))
+            except sqlite3.DatabaseError as e:
+                report.errors.append(ImportIssue(line, data["taratassi"], str(e)))
+        rows = ok
+
+    for _, data in rows:
+        if data["taratassi"] in existing:
+            report.replaced += 1
+        else:
+            report.inserted += 1
+
+
+def import_records(
+    records: Iterable[Tuple[int, Dict]],
+    *,
+    replace: bool = False,
+    lenient: bool = False,
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[ProgressFn] = None,
+) -> ImportReport:
+    """
+    Importa (riga, record) già letti. Con replace=True i taratassi esistenti vengono
+    aggiornati, altrimenti sono segnalati come conflitti e lasciati invariati.
+    `lenient`: vedi normalize_record.
+    Ogni blocco di `batch_size` righe è una transazione.
+    """
+    report = ImportReport()
+    conn = get_conn()
+    batch: List[Tuple[int, Dict]] = []
+
+    def commit_batch():
+        with conn:
+            conn.execute("BEGIN")
+            _flush(conn, batch, replace, report)
+        batch.clear()
+        if progress:
+            progress(report.read)
+
+    for line, raw in records:
+        report.read += 1
+        try:
+            data = normalize_record(raw, lenient=lenient)
+        except ValueError as e:
+            report.errors.append(ImportIssue(line, raw.get("taratassi") or None, str(e)))
+            continue
+        batch.append((line, data))
+        if len(batch) >= batch_size:
+            commit_batch()
+
+    commit_batch()
+    invalidate_records()
+    return report
+
+
+def import_file(filepath: str, **kwargs) -> ImportReport:
+    """Importa un CSV (formato export) o un file JSON lines (.jsonl/.ndjson)."""
+    return import_records(iter_records(filepath), **kwargs)
+
+
+def apply_changes_file(filepath: str, *, lenient: bool = False, batch_size: int = BATCH_SIZE) -> ImportReport:
+    """
+    Applica un export incrementale (export_utils.export_changes_to_jsonl):
+    le righe "upsert" vengono inserite o aggiornate, le "delete" eliminate.
+    """
+    deleted: List[str] = []
+
+    def upserts():
+        for line, raw in iter_jsonl_records(filepath):
+            if raw.get("op") == "delete":
+                if raw.get("taratassi"):
+                    deleted.append(str(raw["taratassi"]))
+                continue
+            yield line, raw
+
+    report = import_records(upserts(), replace=True, lenient=lenient, batch_size=batch_size)
+
+    conn = get_conn()
+    with conn:
+        conn.executemany("DELETE FROM registry WHERE taratassi = ?", [(t,) for t in deleted])
+    invalidate_records()
+    report.read += len(deleted)
+    report.deleted = len(deleted)
+    return report
+
@@ -0,0 +1,130 @@
+"""
+Tab "Informazioni": versione, link al repository, controllo aggiornamenti e
+rimozione sicura della chiavetta.
+"""
+import webbrowser
+
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QThread
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QMessageBox
+
+import db
+from version import __version__
+
+REPO_URL = "https://github.com/lcarotenuto/questionario-ampasilava"
+
+class UpdateWorker(QObject):
+    finished = Signal(object)   # Path | None
+    error = Signal(str)
+
+    @Slot()
+    def run(self):
+        try:
+            # import qui: update_check si porta dietro ssl/urllib, inutili all'avvio
+            from update_check import check_update_and_download
+
+            path = check_update_and_download()
+            self.finished.emit(path)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class InfoTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        lay = QVBoxLayout(self)
+        lay.setAlignment(Qt.AlignTop)
+        lay.setSpacing(12)
+
+        self.lbl_title = QLabel("<h2>Info</h2>")
+        lay.addWidget(self.lbl_title)
+
+        self.lbl_version = QLabel(f"<b>Versione attuale:</b> v{__version__}")
+        lay.addWidget(self.lbl_version)
+
+        self.lbl_repo = QLabel(f'<b>Repository:</b> <a href="{REPO_URL}">{REPO_URL}</a>')
+        self.lbl_repo.setTextInteractionFlags(Qt.TextBrowserInteraction)
+        self.lbl_repo.setOpenExternalLinks(True)
+        lay.addWidget(self.lbl_repo)
+
+        self.btn_updates = QPushButton("Cerca aggiornamenti")
+        self.btn_updates.clicked.connect(self.on_check_updates)
+        lay.addWidget(self.btn_updates)
+
+        self.lbl_status = QLabel("")
+        lay.addWidget(self.lbl_status)
+
+        self.btn_eject = QPushButton("Prepara per rimuovere la chiavetta")
+        self.btn_eject.setToolTip("Scrive tutti i dati nel file del database e chiude i file temporanei")
+        self.btn_eject.clicked.connect(self.on_safe_eject)
+        lay.addWidget(self.btn_eject)
+
+        lay.addStretch(1)
+
+    def on_check_updates(self):
+        self.btn_updates.setEnabled(False)
+        self.lbl_status.setText("Controllo aggiornamenti... (potrebbero volerci diversi minuti)")
+
+        # Thread per non bloccare la GUI
+        self.thread = QThread(self)
+        self.worker = UpdateWorker()
+        self.worker.moveToThread(self.thread)
+
+        self.thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.on_update_finished)
+        self.worker.error.connect(self.on_update_error)
+
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.error.connect(self.thread.quit)
+        self.thread.finished.connect(self.worker.deleteLater)
+        self.thread.finished.connect(self.thread.deleteLater)
+
+        self.thread.start()
+
+    def on_update_finished(self, path):
+        self.btn_updates.setEnabled(True)
+        self.lbl_status.setText("")
+
+        if path is None:
+            QMessageBox.information(self, "Aggiornamenti", "Sei già aggiornato ✅")
+            return
+
+        msg = (
+            "Aggiornamento scaricato ✅\n\n"
+            f"File: {path}\n\n"
+            "Per aggiornare:\n"
+            "1) Chiudi l'app\n"
+            "2) Estrai lo zip\n"
+            "3) Sostituisci i file dell'app (NON il database)"
+        )
+        box = QMessageBox(self)
+        box.setWindowTitle("Aggiornamenti")
+        box.setText(msg)
+
+        open_btn = box.addButton("Apri cartella download", QMessageBox.ActionRole)
+        box.addButton("OK", QMessageBox.AcceptRole)
+
+        box.exec()
+
+        if box.clickedButton() == open_btn:
+            # apri cartella contenente lo zip
+            folder = str(path.parent)
+            webbrowser.open(f"file://{folder}")
+
+    def on_update_error(self, err: str):
+        self.btn_updates.setEnabled(True)
+        self.lbl_status.setText("")
+        QMessageBox.critical(self, "Aggiornamenti", f"Errore:\n\n{err}")
+
+    def on_safe_eject(self):
+        try:
+            db.safe_eject()
+        except Exception as e:
+            QMessageBox.warning(self, "Rimozione chiavetta", str(e))
+            return
+        QMessageBox.information(
+            self, "Rimozione chiavetta",
+            f"Dati salvati in:\n{db.DB_PATH}\n\n"
+            "Chiudi l'app e poi rimuovi la chiavetta. Se nel frattempo salvi altre "
+            "compilazioni, ripeti questa operazione."
+        )
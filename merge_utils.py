@@ -0,0 +1,153 @@
+"""
+Unione dei DB dei diversi portatili in un DB master.
+
+Ogni sorgente viene collegata con ATTACH e unita con poche istruzioni SQL
+(insert/upsert su registry per chiave taratassi), senza cicli Python riga per riga.
+
+Policy di conflitto (stesso taratassi con dati diversi):
+  - "latest":    vince la riga con created_at più recente (a parità resta il master)
+  - "keep_both": resta la riga del master, quella della sorgente viene copiata in
+                 merge_conflicts per essere rivista
+"""
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from db import REGISTRY_COLUMNS, get_conn, invalidate_records
+
+POLICIES = ("latest", "keep_both")
+
+_DATA_COLUMNS = [c for c in REGISTRY_COLUMNS if c != "taratassi"]
+
+
+@dataclass
+class MergeResult:
+    source: str
+    rows: int = 0          # righe nella sorgente
+    inserted: int = 0      # taratassi nuovi
+    updated: int = 0       # righe del master sostituite (policy "latest")
+    conflicts: int = 0     # taratassi presenti in entrambi con dati diversi
+    identical: int = 0     # taratassi presenti in entrambi con gli stessi dati
+
+    def summary(self) -> str:
+        return (
+            f"{self.source}: {self.rows} righe, {self.inserted} nuove, {self.updated} aggiornate, "
+            f"{self.conflicts} conflitti, {self.identical} già presenti"
+        )
+
+
+def _source_select(conn: sqlite3.Connection) -> str:
+    """Colonne di src.registry nell'ordine di REGISTRY_COLUMNS (DB vecchi: default per quelle mancanti)."""
+    cols = {r[1] for r in conn.execute("PRAGMA src.table_info(registry)")}
+    if not cols:
+        raise RuntimeError("Il DB sorgente non contiene la tabella registry.")
+    defaults = {"q6": "'Non so'"}   # aggiunta dalla migrazione 1 -> 2
+    parts = []
+    for c in REGISTRY_COLUMNS:
+        if c in cols:
+            parts.append(f"s.{c}")
+        elif c in defaults:
+            parts.append(f"{defaults[c]} AS {c}")
+        else:
+            raise RuntimeError(f"Il DB sorgente non ha la colonna '{c}'.")
+    return ", ".join(parts)
+
+
+def _merge_source(conn: sqlite3.Connection, source: str, policy: str) -> MergeResult:
+    result = MergeResult(source=source)
+    cols = ", ".join(REGISTRY_COLUMNS)
+    select = _source_select(conn)
+    differs = " OR ".join(f"s.{c} IS NOT m.{c}" for c in _DATA_COLUMNS)
+    # stessa versione già salvata tra i conflitti di questa sorgente
+    saved = " AND ".join(f"c.{c} IS s.{c}" for c in _DATA_COLUMNS)
+
+    # la sorgente vista con le colonne del master
+    conn.execute("DROP VIEW IF EXISTS temp.merge_src")
+    conn.execute(f"CREATE TEMP VIEW merge_src AS SELECT {select} FROM src.registry AS s")
+
+    result.rows, result.inserted = conn.execute("""
+        SELECT COUNT(*),
+               COALESCE(SUM(NOT EXISTS (SELECT 1 FROM main.registry AS m WHERE m.taratassi = s.taratassi)), 0)
+        FROM merge_src AS s
+    """).fetchone()
+    result.conflicts, newer = conn.execute(f"""
+        SELECT COUNT(*), COALESCE(SUM(s.created_at > m.created_at), 0)
+        FROM merge_src AS s JOIN main.registry AS m ON m.taratassi = s.taratassi
+        WHERE {differs}
+    """).fetchone()
+    result.identical = result.rows - result.inserted - result.conflicts
+
+    if policy == "latest":
+        updates = ", ".join(f"{c} = excluded.{c}" for c in _DATA_COLUMNS)
+        # "WHERE true" evita che SQLite legga ON CONFLICT come la ON di una JOIN
+        conn.execute(f"""
+            INSERT INTO main.registry ({cols})
+            SELECT {cols} FROM merge_src WHERE true
+            ON CONFLICT(taratassi) DO UPDATE SET {updates}
+            WHERE excluded.created_at > registry.created_at
+        """)
+        result.updated = newer
+    else:
+        conn.execute(f"""
+            INSERT INTO main.merge_conflicts (source, {cols})
+            SELECT ?1, {", ".join(f"s.{c}" for c in REGISTRY_COLUMNS)}
+            FROM merge_src AS s JOIN main.registry AS m ON m.taratassi = s.taratassi
+            WHERE ({differs})
+              -- rifare il merge della stessa sorgente non duplica i conflitti già salvati;
+              -- una versione modificata nel frattempo (stesso created_at) entra comunque
+              AND NOT EXISTS (
+                  SELECT 1 FROM main.merge_conflicts AS c
+                  WHERE c.source = ?1 AND c.taratassi = s.taratassi AND {saved}
+              )
+        """, (source,))
+        conn.execute(f"""
+            INSERT INTO main.registry ({cols})
+            SELECT {cols} FROM merge_src WHERE true
+            ON CONFLICT(taratassi) DO NOTHING
+        """)
+
+    conn.execute("DROP VIEW temp.merge_src")
+    return result
+
+
+def merge_databases(
+    sources: Iterable[str],
+    *,
+    policy: str = "latest",
+    progress: Optional[Callable[[MergeResult], None]] = None,
+) -> List[MergeResult]:
+    """
+    Unisce i DB `sources` nel DB corrente, una sorgente alla volta,
+    ognuna in una sola transazione. Ritorna un MergeResult per sorgente.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Policy sconosciuta '{policy}' (valori ammessi: {', '.join(POLICIES)})")
+
+    conn = get_conn()
+    master_file = next(r[2] for r in conn.execute("PRAGMA database_list") if r[1] == "main")
+    master = Path(master_file).resolve()
+    results = []
+
+    for source in sources:
+        path = Path(source).resolve()
+        if path == master:
+            raise ValueError(f"La sorgente coincide con il DB master: {path}")
+        if not path.is_file():
+            raise FileNotFoundError(f"DB sorgente non trovato: {path}")
+
+        # ATTACH/DETACH non possono stare dentro una transazione
+        conn.execute("ATTACH DATABASE ? AS src", (str(path),))
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                result = _merge_source(conn, str(path), policy)
+        finally:
+            conn.execute("DETACH DATABASE src")
+            invalidate_records()
+
+        results.append(result)
+        if progress:
+            progress(result)
+
+    return results
@@ -1,9 +1,16 @@
+import os
 import sqlite3
-from typing import Callable, Dict
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
 
-CURRENT_SCHEMA_VERSION = 2  # <-- quando fai modifiche, aumentala a 2, 3, ...
+CURRENT_SCHEMA_VERSION = 8  # <-- quando fai modifiche, aumentala a 2, 3, ...
 
 MigrationFn = Callable[[sqlite3.Connection], None]
+LogFn = Callable[[str], None]
+
+BACKFILL_BATCH_SIZE = 20_000   # righe per transazione nei riempimenti a blocchi
 
 
 def ensure_version_table(conn: sqlite3.Connection) -> None:
@@ -19,6 +26,23 @@ def ensure_version_table(conn: sqlite3.Connection) -> None:
         VALUES (1, 1)
         ON CONFLICT(id) DO NOTHING
     """)
+    # riempimenti a blocchi in corso: ultima riga già fatta, per riprendere dopo un crash
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS migration_progress (
+            version INTEGER PRIMARY KEY,
+            last_rowid INTEGER NOT NULL,
+            end_rowid INTEGER NOT NULL
+        )
+    """)
+    # durata di ogni migrazione applicata (sui portatili non c'è una console da leggere)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS migration_log (
+            version INTEGER NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now')),
+            seconds REAL NOT NULL,
+            rows INTEGER
+        )
+    """)
 
 
 def get_db_version(conn: sqlite3.Connection) -> int:
@@ -28,39 +52,465 @@ def get_db_version(conn: sqlite3.Connection) -> int:
 
 def set_db_version(conn: sqlite3.Connection, version: int) -> None:
     conn.execute("UPDATE schema_version SET version = ? WHERE id = 1", (version,))
+    # copia nell'intestazione del file, per schema_is_current()
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def schema_is_current(conn: sqlite3.Connection) -> bool:
+    """
+    Controllo in sola lettura: PRAGMA user_version legge l'intestazione del file,
+    niente transazioni di scrittura né fsync. Vale solo dopo una migrazione fatta
+    da questa versione dell'app (prima è 0): in quel caso serve migrate_if_needed.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0] == CURRENT_SCHEMA_VERSION
 
 # --- MIGRAZIONI ---
 
 def migration_1_to_2(conn: sqlite3.Connection):
     conn.execute("ALTER TABLE registry ADD COLUMN q6 TEXT NOT NULL DEFAULT 'Non so'")
 
+
+def migration_2_to_3(conn: sqlite3.Connection):
+    # indici B-tree per ordinamento e filtri
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_registry_created_at ON registry (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_registry_village ON registry (village)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_registry_gender ON registry (gender)")
+
+    # indice trigram per la ricerca per sottostringa su taratassi.
+    # Se SQLite è compilato senza FTS5 la ricerca ripiega su LIKE.
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE registry_fts USING fts5(
+                taratassi,
+                content='registry',
+                content_rowid='rowid',
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return
+
+    conn.execute("""
+        CREATE TRIGGER registry_fts_ai AFTER INSERT ON registry BEGIN
+            INSERT INTO registry_fts (rowid, taratassi) VALUES (new.rowid, new.taratassi);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER registry_fts_ad AFTER DELETE ON registry BEGIN
+            INSERT INTO registry_fts (registry_fts, rowid, taratassi) VALUES ('delete', old.rowid, old.taratassi);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER registry_fts_au AFTER UPDATE OF taratassi ON registry BEGIN
+            INSERT INTO registry_fts (registry_fts, rowid, taratassi) VALUES ('delete', old.rowid, old.taratassi);
+            INSERT INTO registry_fts (rowid, taratassi) VALUES (new.rowid, new.taratassi);
+        END
+    """)
+    conn.execute("INSERT INTO registry_fts (registry_fts) VALUES ('rebuild')")
+
+
+def migration_3_to_4(conn: sqlite3.Connection):
+    # indice composto per la paginazione keyset su (created_at, taratassi):
+    # copre anche l'ordinamento per sola data, quindi il vecchio indice non serve più
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_registry_created_taratassi "
+        "ON registry (created_at DESC, taratassi DESC)"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_registry_created_at")
+
+    # con un filtro per villaggio o sesso serve lo stesso ordinamento dopo la colonna
+    # filtrata, altrimenti ogni pagina riordina tutto il villaggio (TEMP B-TREE);
+    # gli indici su una colonna sola, con due valori possibili, non servono più
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_registry_village_created "
+        "ON registry (village, created_at DESC, taratassi DESC)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_registry_gender_created "
+        "ON registry (gender, created_at DESC, taratassi DESC)"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_registry_village")
+    conn.execute("DROP INDEX IF EXISTS idx_registry_gender")
+
+
+def migration_4_to_5(conn: sqlite3.Connection):
+    # righe in conflitto trovate durante l'unione di più DB (policy "keep_both"):
+    # la versione del master resta in registry, l'altra finisce qui da rivedere
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS merge_conflicts (
+            id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            detected_at TEXT NOT NULL DEFAULT (datetime('now')),
+            resolved INTEGER NOT NULL DEFAULT 0 CHECK (resolved IN (0,1)),
+            taratassi TEXT NOT NULL,
+            village TEXT,
+            consent INTEGER,
+            witnessed INTEGER,
+            declared_age INTEGER,
+            age_estimation INTEGER,
+            gender TEXT,
+            muac REAL,
+            weight REAL,
+            height REAL,
+            whz REAL,
+            q1 TEXT, q2 TEXT, q3 TEXT, q4 TEXT, q5 TEXT, q6 TEXT,
+            created_at TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_merge_conflicts_taratassi ON merge_conflicts (taratassi)")
+
+
+def migration_5_to_6(conn: sqlite3.Connection):
+    # registro append-only delle modifiche a registry, per gli export incrementali
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS registry_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL CHECK (op IN ('I','U','D')),
+            taratassi TEXT NOT NULL,
+            changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_registry_changes_taratassi ON registry_changes (taratassi, seq)")
+
+    conn.execute("""
+        CREATE TRIGGER registry_changes_ai AFTER INSERT ON registry BEGIN
+            INSERT INTO registry_changes (op, taratassi) VALUES ('I', new.taratassi);
+        END
+    """)
+    # solo le colonne dati: aggiornamenti di colonne derivate non finiscono nel log
+    conn.execute("""
+        CREATE TRIGGER registry_changes_au AFTER UPDATE OF
+            taratassi, village, consent, witnessed, declared_age, age_estimation, gender,
+            muac, weight, height, whz, q1, q2, q3, q4, q5, q6, created_at
+        ON registry BEGIN
+            INSERT INTO registry_changes (op, taratassi)
+                SELECT 'D', old.taratassi WHERE old.taratassi IS NOT new.taratassi;
+            INSERT INTO registry_changes (op, taratassi) VALUES ('U', new.taratassi);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER registry_changes_ad AFTER DELETE ON registry BEGIN
+            INSERT INTO registry_changes (op, taratassi) VALUES ('D', old.taratassi);
+        END
+    """)
+
+    # le righe già presenti entrano nel log: un export "dall'inizio" è completo
+    conn.execute("""
+        INSERT INTO registry_changes (op, taratassi)
+        SELECT 'I', taratassi FROM registry ORDER BY created_at, taratassi
+    """)
+
+
+def migration_6_to_7(conn: sqlite3.Connection):
+    # riepilogo materializzato per le statistiche (stats.py): conteggi per giorno,
+    # villaggio, sesso, fascia d'età e classe di malnutrizione (-1 = non calcolabile),
+    # tenuti aggiornati dai trigger su registry
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS registry_summary (
+            day TEXT NOT NULL,
+            village TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age_band INTEGER NOT NULL,
+            class INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (day, village, gender, age_band, class)
+        ) WITHOUT ROWID
+    """)
+    # totali senza la data: poche righe (villaggi x sessi x fasce x classi),
+    # la lettura del cruscotto non dipende dal numero di bambini
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS registry_totals (
+            village TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            age_band INTEGER NOT NULL,
+            class INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (village, gender, age_band, class)
+        ) WITHOUT ROWID
+    """)
+
+    # stesse regole di whz.classify / stats.CLASS_SQL (-1 = non calcolabile)
+    def class_sql(r):
+        return (
+            f"CASE WHEN {r}.muac > 0 AND {r}.muac <= 11.5 AND {r}.declared_age > 6 THEN 2 "
+            f"WHEN {r}.whz IS NULL THEN -1 WHEN {r}.whz >= -2 THEN 0 WHEN {r}.whz >= -3 THEN 1 ELSE 2 END"
+        )
+
+    def band_sql(r):
+        return (
+            f"CASE WHEN {r}.declared_age <= 5 THEN 0 WHEN {r}.declared_age <= 11 THEN 1 "
+            f"WHEN {r}.declared_age <= 23 THEN 2 WHEN {r}.declared_age <= 35 THEN 3 "
+            f"WHEN {r}.declared_age <= 47 THEN 4 WHEN {r}.declared_age <= 59 THEN 5 ELSE 6 END"
+        )
+
+    def add(r):
+        return f"""
+            INSERT INTO registry_summary (day, village, gender, age_band, class, n)
+            VALUES (date({r}.created_at), {r}.village, {r}.gender, {band_sql(r)}, {class_sql(r)}, 1)
+            ON CONFLICT (day, village, gender, age_band, class) DO UPDATE SET n = n + 1;
+            INSERT INTO registry_totals (village, gender, age_band, class, n)
+            VALUES ({r}.village, {r}.gender, {band_sql(r)}, {class_sql(r)}, 1)
+            ON CONFLICT (village, gender, age_band, class) DO UPDATE SET n = n + 1;
+        """
+
+    def remove(r):
+        summary_key = (
+            f"day = date({r}.created_at) AND village = {r}.village AND gender = {r}.gender "
+            f"AND age_band = {band_sql(r)} AND class = {class_sql(r)}"
+        )
+        totals_key = (
+            f"village = {r}.village AND gender = {r}.gender "
+            f"AND age_band = {band_sql(r)} AND class = {class_sql(r)}"
+        )
+        return f"""
+            UPDATE registry_summary SET n = n - 1 WHERE {summary_key};
+            DELETE FROM registry_summary WHERE {summary_key} AND n <= 0;
+            UPDATE registry_totals SET n = n - 1 WHERE {totals_key};
+            DELETE FROM registry_totals WHERE {totals_key} AND n <= 0;
+        """
+
+    conn.execute(f"CREATE TRIGGER registry_summary_ai AFTER INSERT ON registry BEGIN {add('new')} END")
+    conn.execute(f"CREATE TRIGGER registry_summary_ad AFTER DELETE ON registry BEGIN {remove('old')} END")
+    # solo le colonne che spostano la riga tra i contatori
+    conn.execute(f"""
+        CREATE TRIGGER registry_summary_au AFTER UPDATE OF
+            created_at, village, gender, declared_age, muac, whz
+        ON registry BEGIN {remove('old')} {add('new')} END
+    """)
+
+    # contatori iniziali con una passata sola su registry
+    conn.execute("DELETE FROM registry_summary")
+    conn.execute(f"""
+        INSERT INTO registry_summary (day, village, gender, age_band, class, n)
+        SELECT date(r.created_at), r.village, r.gender, {band_sql('r')}, {class_sql('r')}, COUNT(*)
+        FROM registry AS r GROUP BY 1, 2, 3, 4, 5
+    """)
+    conn.execute("""
+        INSERT INTO registry_totals (village, gender, age_band, class, n)
+        SELECT village, gender, age_band, class, SUM(n) FROM registry_summary GROUP BY 1, 2, 3, 4
+    """)
+
+
+# stesse regole di whz.classify (MUAC = 0: non misurato), NULL = non calcolabile
+def _class_sql_v8(r):
+    return (
+        f"CASE WHEN {r}.muac > 0 AND {r}.muac <= 11.5 AND {r}.declared_age > 6 THEN 2 "
+        f"WHEN {r}.whz IS NULL THEN NULL WHEN {r}.whz >= -2 THEN 0 WHEN {r}.whz >= -3 THEN 1 ELSE 2 END"
+    )
+
+
+def migration_7_to_8(conn: sqlite3.Connection):
+    # classe di malnutrizione salvata nella riga (whz.CLASS_*: 0 = no, 1 = moderata,
+    # 2 = severa, NULL = non calcolabile), per filtrare senza ricalcolare nulla
+    # con un CHECK, ADD COLUMN riverifica tutti i vincoli della tabella su ogni riga
+    # (secondi su un DB grande, a DB bloccato): la colonna nuova è NULL ovunque,
+    # quindi il controllo si può saltare
+    conn.execute("PRAGMA ignore_check_constraints = ON")
+    try:
+        conn.execute(
+            "ALTER TABLE registry ADD COLUMN malnutrition INTEGER CHECK (malnutrition IN (0, 1, 2))"
+        )
+    finally:
+        conn.execute("PRAGMA ignore_check_constraints = OFF")
+
+    # tenuta allineata dai trigger; l'UPDATE tocca solo malnutrition, che non è tra
+    # le colonne osservate dagli altri trigger (registro modifiche, contatori, FTS)
+    conn.execute(f"""
+        CREATE TRIGGER registry_malnutrition_ai AFTER INSERT ON registry BEGIN
+            UPDATE registry SET malnutrition = {_class_sql_v8('new')} WHERE rowid = new.rowid;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER registry_malnutrition_au AFTER UPDATE OF muac, whz, declared_age ON registry BEGIN
+            UPDATE registry SET malnutrition = {_class_sql_v8('new')} WHERE rowid = new.rowid;
+        END
+    """)
+    # le righe esistenti le riempie BACKFILLS[8], a blocchi
+
+
+def migration_7_to_8_index(conn: sqlite3.Connection):
+    # dopo il riempimento: l'indice si costruisce in una passata invece di
+    # aggiornarlo riga per riga. Per classe, nell'ordine della tabella risultati.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_registry_malnutrition "
+        "ON registry (malnutrition, created_at DESC, taratassi DESC)"
+    )
+
+
+@dataclass(frozen=True)
+class Backfill:
+    """
+    Riempimento a blocchi che segue una migrazione, per le modifiche che riscrivono
+    tutte le righe di una tabella (colonne calcolate, ricalcoli, copie).
+
+    `sql` riceve due parametri, (primo rowid escluso, ultimo rowid incluso), e viene
+    eseguito una transazione per blocco: il DB non resta bloccato per minuti e dopo
+    un crash si riparte dall'ultimo blocco salvato in migration_progress.
+    Si riempiono le righe presenti a inizio migrazione: quelle inserite o modificate
+    nel frattempo le deve già gestire la migrazione (es. con i trigger).
+    `finish` chiude il lavoro (indici, vincoli) nella stessa transazione che
+    aggiorna la versione.
+    """
+    table: str
+    sql: str
+    finish: Optional[MigrationFn] = None
+
+
 MIGRATIONS: Dict[int, MigrationFn] = {
      2: migration_1_to_2,  # "per arrivare alla versione 2"
+     3: migration_2_to_3,
+     4: migration_3_to_4,
+     5: migration_4_to_5,
+     6: migration_5_to_6,
+     7: migration_6_to_7,
+     8: migration_7_to_8,
 }
 
+# versione -> riempimento da fare dopo la migrazione che porta a quella versione
+BACKFILLS: Dict[int, Backfill] = {
+    8: Backfill(
+        "registry",
+        f"UPDATE registry SET malnutrition = {_class_sql_v8('registry')} WHERE rowid > ? AND rowid <= ?",
+        finish=migration_7_to_8_index,
+    ),
+}
+
+
+def _log_duration(conn: sqlite3.Connection, version: int, started: float, rows: Optional[int], log) -> None:
+    seconds = time.perf_counter() - started
+    conn.execute(
+        "INSERT INTO migration_log (version, seconds, rows) VALUES (?, ?, ?)", (version, seconds, rows)
+    )
+    if log:
+        done = f", {rows} righe riempite" if rows is not None else ""
+        log(f"v{version - 1} -> v{version}: {seconds:.2f}s{done}")
 
-def migrate_if_needed(conn: sqlite3.Connection) -> None:
+
+def _backfill(conn: sqlite3.Connection, version: int, backfill: Backfill, batch_size: int, log) -> int:
+    """Esegue i blocchi mancanti di `backfill`, uno per transazione; ritorna le righe riempite."""
+    last, end = conn.execute(
+        "SELECT last_rowid, end_rowid FROM migration_progress WHERE version = ?", (version,)
+    ).fetchone()
+    if last and log:
+        log(f"v{version}: riprendo il riempimento di {backfill.table} dal rowid {last}")
+    rows = 0
+    while last < end:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # blocchi di batch_size righe esatte anche con buchi nei rowid
+            row = conn.execute(
+                f"SELECT rowid FROM {backfill.table} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?",
+                (last, batch_size - 1),
+            ).fetchone()
+            upto = min(row[0], end) if row else end
+            rows += conn.execute(backfill.sql, (last, upto)).rowcount
+            conn.execute("UPDATE migration_progress SET last_rowid = ? WHERE version = ?", (upto, version))
+        last = upto
+    return rows
+
+
+def migrate_if_needed(
+    conn: sqlite3.Connection,
+    *,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    log: Optional[LogFn] = None,
+) -> None:
     """
     Porta il DB alla versione CURRENT_SCHEMA_VERSION.
-    Esegue migrazioni incrementalmente: v->v+1.
+    Esegue migrazioni incrementalmente: v->v+1, una transazione per versione
+    (più una per blocco dei riempimenti in BACKFILLS). La durata di ognuna finisce
+    in migration_log e, se c'è, in `log`.
     """
-    # transazione unica
     with conn:
         ensure_version_table(conn)
         db_version = get_db_version(conn)
+        if db_version == CURRENT_SCHEMA_VERSION:
+            # DB già aggiornato da una versione dell'app che non scriveva user_version
+            conn.execute(f"PRAGMA user_version = {db_version}")
+
+    if db_version > CURRENT_SCHEMA_VERSION:
+        raise RuntimeError(
+            f"DB version {db_version} > app version {CURRENT_SCHEMA_VERSION}. "
+            "Hai una app più vecchia del database."
+        )
+
+    while db_version < CURRENT_SCHEMA_VERSION:
+        next_version = db_version + 1
+        fn = MIGRATIONS.get(next_version)
+        if not fn:
+            raise RuntimeError(f"Migrazione mancante per arrivare alla versione {next_version}")
+        backfill = BACKFILLS.get(next_version)
+        started = time.perf_counter()
 
-        if db_version > CURRENT_SCHEMA_VERSION:
-            raise RuntimeError(
-                f"DB version {db_version} > app version {CURRENT_SCHEMA_VERSION}. "
-                "Hai una app più vecchia del database."
+        with conn:
+            # BEGIN esplicito: anche i CREATE/ALTER stanno nella transazione
+            conn.execute("BEGIN IMMEDIATE")
+            in_progress = conn.execute(
+                "SELECT 1 FROM migration_progress WHERE version = ?", (next_version,)
+            ).fetchone()
+            # migrazione già applicata da un avvio precedente, riempimento interrotto
+            if not in_progress:
+                fn(conn)
+            if backfill is None:
+                set_db_version(conn, next_version)
+                _log_duration(conn, next_version, started, None, log)
+            elif not in_progress:
+                conn.execute(
+                    f"INSERT INTO migration_progress (version, last_rowid, end_rowid) "
+                    f"SELECT ?, 0, COALESCE(MAX(rowid), 0) FROM {backfill.table}",
+                    (next_version,),
+                )
+
+        if backfill is not None:
+            rows = _backfill(conn, next_version, backfill, batch_size, log)
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if backfill.finish:
+                    backfill.finish(conn)
+                conn.execute("DELETE FROM migration_progress WHERE version = ?", (next_version,))
+                set_db_version(conn, next_version)
+                _log_duration(conn, next_version, started, rows, log)
+
+        db_version = next_version
+
+
+def preflight(
+    conn: sqlite3.Connection,
+    *,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    log: Optional[LogFn] = None,
+) -> List[Tuple[int, float]]:
+    """
+    Prova generale: copia il DB in un file temporaneo e ci applica le migrazioni
+    mancanti, senza toccare l'originale. Ritorna [(versione, secondi)], da usare
+    come stima prima di migrare un DB grande (serve spazio per una copia).
+    """
+    fd, path = tempfile.mkstemp(suffix=".sqlite3", prefix="preflight-")
+    os.close(fd)
+    copy = sqlite3.connect(path)
+    try:
+        conn.backup(copy)
+        copy.execute("PRAGMA journal_mode = WAL")
+        copy.execute("PRAGMA synchronous = NORMAL")
+        migrate_if_needed(copy, batch_size=batch_size, log=log)
+        return [
+            (int(r[0]), float(r[1]))
+            for r in copy.execute(
+                "SELECT version, seconds FROM migration_log WHERE rowid > ? ORDER BY rowid",
+                (_last_log_rowid(conn),),
             )
+        ]
+    finally:
+        copy.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except FileNotFoundError:
+                pass
 
-        while db_version < CURRENT_SCHEMA_VERSION:
-            next_version = db_version + 1
-            fn = MIGRATIONS.get(next_version)
-            if not fn:
-                raise RuntimeError(f"Migrazione mancante per arrivare alla versione {next_version}")
 
-            fn(conn)
-            set_db_version(conn, next_version)
-            db_version = next_version
\ No newline at end of file
+def _last_log_rowid(conn: sqlite3.Connection) -> int:
+    try:
+        return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM migration_log").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0   # DB mai migrato con il registro delle durate
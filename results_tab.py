@@ -0,0 +1,526 @@
+"""
+Tab "Risultati": ricerca con filtri, tabella paginata, modifica/eliminazione ed export.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QThread, QTimer, QAbstractTableModel, QModelIndex
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QPushButton, QMessageBox,
+    QTableView, QAbstractItemView, QFileDialog, QProgressBar
+)
+
+from db import (
+    RECORD_COLUMNS, add_record_listener, close_conn, count_registry, delete_registry,
+    iter_registry_pages, list_registry_page, remove_record_listener,
+)
+from form_tab import VILLAGGI, SESSI, EditDialog
+from whz import CLASS_LABELS, CLASS_MODERATE, CLASS_NONE, CLASS_SEVERE
+
+SEARCH_DEBOUNCE_MS = 250   # attesa dopo l'ultimo tasto prima di interrogare il DB
+SEARCH_CACHE_SIZE = 8      # ultime ricerche tenute in memoria
+RESULTS_PAGE_SIZE = 200    # righe lette dal DB per ogni fetchMore
+COLUMN_SIZE_SAMPLE = 50    # righe misurate per dimensionare le colonne
+
+# voci del filtro per classe di malnutrizione -> valore del filtro "malnutrition"
+MALNUTRITION_FILTERS = [
+    ("Tutte le classi", None),
+    (CLASS_LABELS[CLASS_NONE], CLASS_NONE),
+    (CLASS_LABELS[CLASS_MODERATE], CLASS_MODERATE),
+    (CLASS_LABELS[CLASS_SEVERE], CLASS_SEVERE),
+    ("Moderata o severa", (CLASS_MODERATE, CLASS_SEVERE)),
+]
+
+class SearchWorker(QObject):
+    finished = Signal(int, object, object)   # request_id, filtri, (righe, cursore)
+    error = Signal(int, str)
+
+    @Slot(int, object)
+    def run(self, request_id: int, filters: dict):
+        try:
+            # solo la prima pagina: le successive le carica il model quando servono
+            page = list_registry_page(
+                columns=RECORD_COLUMNS, page_size=RESULTS_PAGE_SIZE, **filters
+            )
+            self.finished.emit(request_id, filters, page)
+        except Exception as e:
+            self.error.emit(request_id, str(e))
+
+
+class ExportWorker(QObject):
+    progress = Signal(int, int)   # righe scritte, totale
+    finished = Signal(int)        # righe esportate
+    cancelled = Signal()
+    error = Signal(str)
+
+    def __init__(self, fmt: str, filters: dict, total: int, path: str):
+        super().__init__()
+        self.fmt = fmt
+        self.filters = filters
+        self.total = total
+        self.path = path
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        # chiamato dal thread GUI: l'export si ferma alla pagina successiva
+        self._cancel.set()
+
+    @Slot()
+    def run(self):
+        # export_utils (e le librerie di compressione/pyarrow) servono solo qui
+        from export_utils import EXPORT_HEADERS, ExportCancelled, export_pages
+
+        try:
+            # le righe arrivano dal DB a pagine: l'archivio non viene mai caricato tutto
+            n = export_pages(
+                self.fmt,
+                iter_registry_pages(columns=EXPORT_HEADERS, **self.filters),
+                self.path,
+                total=self.total,
+                progress=lambda done, total: self.progress.emit(done, total or 0),
+                is_cancelled=self._cancel.is_set,
+            )
+            self.finished.emit(n)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            # thread usa e getta: la sua connessione non serve più
+            close_conn()
+
+
+class RegistryTableModel(QAbstractTableModel):
+    """
+    Model in sola lettura per la tabella risultati.
+    Le righe arrivano dal DB a pagine (canFetchMore/fetchMore) e le celle
+    vengono formattate solo quando la vista le disegna. Si leggono righe complete
+    (db.RECORD_COLUMNS, non solo le colonne mostrate): finiscono nella cache dei
+    record e il dialog di modifica non deve rileggerle.
+    """
+    COLUMNS = [
+        "taratassi", "village", "declared_age", "age_estimation", "gender",
+        "muac", "weight", "height", "whz", "malnutrition",
+        "q1", "q2", "q3", "q4", "q5", "q6",
+        "created_at"
+    ]
+    LABELS = [
+        "Taratassi", "Villaggio", "Età dichiarata", "Età stimata", "Sesso",
+        "MUAC", "Peso", "Altezza", "WHZ", "Malnutrizione",
+        "Domanda 1", "Domanda 2", "Domanda 3", "Domanda 4", "Domanda 5", "Domanda 6",
+        "Data creazione"
+    ]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filters = {}
+        self._rows = []
+        self._cursor = None   # (created_at, taratassi) dell'ultima riga caricata
+
+    def set_rows(self, filters: dict, page) -> None:
+        """Sostituisce il contenuto con la prima pagina (righe, cursore) di una ricerca."""
+        rows, cursor = page
+        self.beginResetModel()
+        self._filters = dict(filters)
+        self._rows = list(rows)
+        self._cursor = cursor
+        self.endResetModel()
+
+    def taratassi_at(self, row: int) -> Optional[str]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]["taratassi"]
+        return None
+
+    def remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+    @property
+    def filters(self) -> dict:
+        return self._filters
+
+    def row_of(self, taratassi: str) -> Optional[int]:
+        for i, r in enumerate(self._rows):
+            if r["taratassi"] == taratassi:
+                return i
+        return None
+
+    def replace_row(self, row: int, record: dict) -> None:
+        self._rows[row] = record
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.COLUMNS) - 1))
+
+    def insert_record(self, record: dict) -> None:
+        """Inserisce una riga nuova al suo posto nell'ordinamento (created_at, taratassi) decrescente."""
+        key = (record["created_at"], record["taratassi"])
+        pos = next(
+            (i for i, r in enumerate(self._rows) if (r["created_at"], r["taratassi"]) < key),
+            len(self._rows),
+        )
+        if pos == len(self._rows) and self._cursor is not None:
+            return   # oltre le righe caricate: arriverà con fetchMore
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, record)
+        self.endInsertRows()
+
+    # ---------- QAbstractTableModel ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        col = self.COLUMNS[index.column()]
+        v = self._rows[index.row()][col]
+        if col == "malnutrition":
+            return CLASS_LABELS[v]
+        return "" if v is None else str(v)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.LABELS[section]
+        return str(section + 1)
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled  # sola lettura
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._cursor is None:
+            return
+        rows, self._cursor = list_registry_page(
+            columns=RECORD_COLUMNS, page_size=RESULTS_PAGE_SIZE, after=self._cursor, **self._filters
+        )
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+
+def _matches(filters: dict, record: dict) -> bool:
+    """True se `record` rientra nei filtri della tabella (gli stessi di _filters)."""
+    text = filters.get("taratassi")
+    if text and text.upper() not in record["taratassi"].upper():
+        return False
+    for key in ("village", "gender"):
+        if filters.get(key) and record[key] != filters[key]:
+            return False
+    classes = filters.get("malnutrition")
+    if classes is not None:
+        if not isinstance(classes, tuple):
+            classes = (classes,)
+        if record["malnutrition"] not in classes:
+            return False
+    return True
+
+
+class ResultsTab(QWidget):
+    search_requested = Signal(int, object)
+    # (op, taratassi, riga) da db.add_record_listener: arriva anche dal thread di scrittura
+    record_changed = Signal(str, object, object)
+
+    def __init__(self):
+        super().__init__()
+        self._request_id = 0
+        self._searching = False        # c'è una ricerca in volo (id = _request_id)
+        self._cache = OrderedDict()   # filtri -> prima pagina (righe, cursore)
+        self._build()
+        self._start_search_thread()
+        self.record_changed.connect(self._on_record_changed)
+        self._record_listener = self.record_changed.emit
+        add_record_listener(self._record_listener)
+        self.refresh()
+
+    def _build(self):
+        lay = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Cerca Taratassi...")
+        self.village_filter = QComboBox()
+        self.village_filter.addItems(["Tutti i villaggi"] + VILLAGGI[1:])
+        self.gender_filter = QComboBox()
+        self.gender_filter.addItems(["Tutti i sessi"] + SESSI[1:])
+        self.class_filter = QComboBox()
+        self.class_filter.addItems([label for label, _ in MALNUTRITION_FILTERS])
+        self.refresh_btn = QPushButton("Aggiorna")
+        self.export_btn = QPushButton("Esporta...")
+        self.edit_btn = QPushButton("Modifica selezionato")
+        top.addWidget(self.edit_btn)
+
+        self.delete_btn = QPushButton("Elimina selezionato")
+        top.addWidget(self.delete_btn)
+
+        top.addWidget(self.search, 1)
+        top.addWidget(self.village_filter)
+        top.addWidget(self.gender_filter)
+        top.addWidget(self.class_filter)
+        top.addWidget(self.refresh_btn)
+        top.addWidget(self.export_btn)
+        lay.addLayout(top)
+
+        # barra di avanzamento dell'export (visibile solo durante l'export)
+        export_row = QHBoxLayout()
+        self.export_progress = QProgressBar()
+        self.export_progress.setFormat("Esportazione: %v / %m righe")
+        self.export_cancel_btn = QPushButton("Annulla export")
+        export_row.addWidget(self.export_progress, 1)
+        export_row.addWidget(self.export_cancel_btn)
+        lay.addLayout(export_row)
+        self._set_export_running(False)
+
+        self.model = RegistryTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        # le colonne si dimensionano su un campione, non su tutte le righe
+        self.table.horizontalHeader().setResizeContentsPrecision(COLUMN_SIZE_SAMPLE)
+        lay.addWidget(self.table, 1)
+
+        # debounce: la ricerca parte solo quando l'utente smette di digitare
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._run_search)
+
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.search.textChanged.connect(self._search_timer.start)
+        self.village_filter.currentIndexChanged.connect(self._run_search)
+        self.gender_filter.currentIndexChanged.connect(self._run_search)
+        self.class_filter.currentIndexChanged.connect(self._run_search)
+        self.export_btn.clicked.connect(self.export_csv)
+        self.export_cancel_btn.clicked.connect(self.cancel_export)
+        self.edit_btn.clicked.connect(self.edit_selected)
+        self.delete_btn.clicked.connect(self.delete_selected)
+        self.table.doubleClicked.connect(self.edit_selected)
+
+    def _start_search_thread(self):
+        # thread persistente: le query non bloccano la GUI
+        self.search_thread = QThread(self)
+        self.search_worker = SearchWorker()
+        self.search_worker.moveToThread(self.search_thread)
+
+        self.search_requested.connect(self.search_worker.run)
+        self.search_worker.finished.connect(self._on_search_finished)
+        self.search_worker.error.connect(self._on_search_error)
+        self.search_thread.finished.connect(self.search_worker.deleteLater)
+
+        self.search_thread.start()
+
+    def shutdown(self):
+        remove_record_listener(self._record_listener)
+        self._search_timer.stop()
+        self.search_thread.quit()
+        self.search_thread.wait()
+        if self._export_running:
+            self.export_worker.cancel()
+            self.export_thread.wait()
+
+    def delete_selected(self):
+        row = self.table.currentIndex().row()
+        if row < 0:
+            QMessageBox.warning(
+                self,
+                "Nessuna selezione",
+                "Seleziona un record da eliminare."
+            )
+            return
+
+        taratassi = self.model.taratassi_at(row)
+        if not taratassi:
+            return
+
+        confirm = QMessageBox.question(
+            self,
+            "Conferma eliminazione",
+            f"Vuoi eliminare il record con Taratassi:\n\n{taratassi} ?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes
+        )
+
+        if confirm != QMessageBox.Yes:
+            return
+
+        try:
+            # la riga sparisce dalla tabella con _on_record_changed
+            delete_registry(taratassi)
+
+        except Exception as e:
+            QMessageBox.critical(
+                self,
+                "Errore",
+                f"Errore durante l'eliminazione:\n{e}"
+            )
+
+    def _on_record_changed(self, op: str, taratassi, record):
+        # le prime pagine in cache possono contenere la riga vecchia
+        self._cache.clear()
+        if op == "invalidate" or self._searching:
+            # una ricerca già partita può aver letto prima della scrittura:
+            # la sua risposta sovrascriverebbe la riga, si rilancia
+            self.refresh()
+            return
+
+        # solo la riga cambiata, senza rileggere la tabella
+        row = self.model.row_of(taratassi)
+        keep = record is not None and _matches(self.model.filters, record)
+        if row is not None and keep:
+            self.model.replace_row(row, record)
+        elif row is not None:
+            self.model.remove_row(row)
+        elif keep:
+            self.model.insert_record(record)
+
+    def refresh(self):
+        # i dati sono cambiati (o l'utente ha chiesto di ricaricare): cache non più valida
+        self._cache.clear()
+        self._run_search()
+
+    def _filters(self) -> Dict[str, Any]:
+        filters: Dict[str, Any] = {"taratassi": self.search.text().strip()}
+        if self.village_filter.currentIndex() > 0:
+            filters["village"] = self.village_filter.currentText()
+        if self.gender_filter.currentIndex() > 0:
+            filters["gender"] = self.gender_filter.currentText()
+        malnutrition = MALNUTRITION_FILTERS[self.class_filter.currentIndex()][1]
+        if malnutrition is not None:
+            filters["malnutrition"] = malnutrition
+        return filters
+
+    def _run_search(self):
+        self._search_timer.stop()
+        filters = self._filters()
+        key = tuple(sorted(filters.items()))
+
+        page = self._cache.get(key)
+        if page is not None:
+            self._cache.move_to_end(key)
+            self._request_id += 1   # scarta eventuali risposte ancora in volo
+            self._searching = False
+            self._fill(filters, page)
+            return
+
+        self._request_id += 1
+        self._searching = True
+        self.search_requested.emit(self._request_id, filters)
+
+    def _on_search_finished(self, request_id: int, filters: dict, page):
+        if request_id != self._request_id:
+            return  # risultato superato da una ricerca più recente
+        self._searching = False
+
+        self._cache[tuple(sorted(filters.items()))] = page
+        while len(self._cache) > SEARCH_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        self._fill(filters, page)
+
+    def _on_search_error(self, request_id: int, err: str):
+        if request_id != self._request_id:
+            return
+        self._searching = False
+        QMessageBox.critical(self, "Errore ricerca", err)
+
+    def _fill(self, filters: dict, page):
+        self.model.set_rows(filters, page)
+        self.table.resizeColumnsToContents()
+
+    def export_csv(self):
+        filters = self._filters()
+        total = count_registry(**filters)
+        if not total:
+            QMessageBox.information(self, "Nessun dato", "Non ci sono record da esportare.")
+            return
+        from export_utils import available_exporters
+
+        exporters = available_exporters()
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Esporta risultati", "risultati.csv", ";;".join(e.file_filter for e in exporters)
+        )
+        if not path:
+            return
+        exporter = next((e for e in exporters if e.file_filter == selected), exporters[0])
+        if not path.endswith(exporter.suffix):
+            # "risultati.csv" salvato come parquet: l'estensione va sostituita, non accodata
+            for suffix in sorted({e.suffix for e in exporters}, key=len, reverse=True):
+                if path.endswith(suffix):
+                    path = path[:-len(suffix)]
+                    break
+            path += exporter.suffix
+
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(0)
+        self._set_export_running(True)
+
+        # Thread per non bloccare la GUI
+        self.export_thread = QThread(self)
+        self.export_worker = ExportWorker(exporter.name, filters, total, path)
+        self.export_worker.moveToThread(self.export_thread)
+
+        self.export_thread.started.connect(self.export_worker.run)
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.finished.connect(self._on_export_finished)
+        self.export_worker.cancelled.connect(self._on_export_cancelled)
+        self.export_worker.error.connect(self._on_export_error)
+
+        self.export_worker.finished.connect(self.export_thread.quit)
+        self.export_worker.cancelled.connect(self.export_thread.quit)
+        self.export_worker.error.connect(self.export_thread.quit)
+        self.export_thread.finished.connect(self.export_worker.deleteLater)
+        self.export_thread.finished.connect(self.export_thread.deleteLater)
+
+        self.export_thread.start()
+
+    def cancel_export(self):
+        self.export_cancel_btn.setEnabled(False)
+        self.export_worker.cancel()
+
+    def _set_export_running(self, running: bool):
+        self._export_running = running
+        self.export_btn.setEnabled(not running)
+        self.export_cancel_btn.setEnabled(running)
+        self.export_progress.setVisible(running)
+        self.export_cancel_btn.setVisible(running)
+
+    def _on_export_progress(self, done: int, total: int):
+        self.export_progress.setValue(done)
+
+    def _on_export_finished(self, n: int):
+        self._set_export_running(False)
+        QMessageBox.information(self, "OK", f"Export completato correttamente ({n} righe).")
+
+    def _on_export_cancelled(self):
+        self._set_export_running(False)
+        QMessageBox.information(self, "Export annullato", "Export annullato: nessun file è stato creato.")
+
+    def _on_export_error(self, err: str):
+        self._set_export_running(False)
+        QMessageBox.critical(self, "Errore export", err)
+
+    def _selected_taratassi(self):
+        row = self.table.currentIndex().row()
+        if row < 0:
+            return None
+        tar = self.model.taratassi_at(row)
+        return tar.strip() if tar else None
+
+    def edit_selected(self, *_):
+        tar = self._selected_taratassi()
+        if not tar:
+            QMessageBox.warning(self, "Attenzione", "Seleziona una riga da modificare.")
+            return
+
+        # al salvataggio la riga si aggiorna da sola (_on_record_changed)
+        dlg = EditDialog(tar, self)
+        dlg.exec()
+        dlg.deleteLater()
@@ -0,0 +1,212 @@
+"""
+Statistiche aggregate (conteggi, prevalenza della malnutrizione, fasce d'età,
+compilazioni per giorno), calcolate in SQL.
+
+Le letture non toccano registry: usano due tabelle di contatori mantenute dai
+trigger di registry (migrazione 7) a ogni INSERT/UPDATE/DELETE:
+- registry_summary: un conteggio per (giorno, villaggio, sesso, fascia d'età, classe)
+- registry_totals: lo stesso senza il giorno, poche decine di righe in tutto;
+  senza filtri per data le letture usano questa e costano O(1)
+
+rebuild_summary() li ricalcola da zero, check_summary() li confronta con un
+ricalcolo completo senza modificarli.
+"""
+import sqlite3
+from typing import Dict, List, Tuple
+
+from db import get_conn
+from whz import (
+    CLASS_MODERATE, CLASS_NONE, CLASS_SEVERE,
+    MUAC_MIN_AGE, MUAC_SEVERE, WHZ_MODERATE, WHZ_SEVERE,
+)
+
+# fasce d'età in mesi: (etichetta, da, a) estremi inclusi
+AGE_BANDS = (
+    ("0-5 mesi", 0, 5),
+    ("6-11 mesi", 6, 11),
+    ("12-23 mesi", 12, 23),
+    ("24-35 mesi", 24, 35),
+    ("36-47 mesi", 36, 47),
+    ("48-59 mesi", 48, 59),
+    ("60+ mesi", 60, None),
+)
+
+CLASS_UNKNOWN = -1   # nei contatori: WHZ non calcolabile (None in whz.classify)
+
+# stesse regole di whz.classify (e dei trigger della migrazione 7), in SQL;
+# MUAC = 0 vuol dire "non misurato"
+CLASS_SQL = f"""CASE
+    WHEN muac > 0 AND muac <= {MUAC_SEVERE} AND declared_age > {MUAC_MIN_AGE} THEN {CLASS_SEVERE}
+    WHEN whz IS NULL THEN {CLASS_UNKNOWN}
+    WHEN whz >= {WHZ_MODERATE} THEN {CLASS_NONE}
+    WHEN whz >= {WHZ_SEVERE} THEN {CLASS_MODERATE}
+    ELSE {CLASS_SEVERE}
+END"""
+
+AGE_BAND_SQL = "CASE {} ELSE {} END".format(
+    " ".join(f"WHEN declared_age <= {hi} THEN {i}" for i, (_, _, hi) in enumerate(AGE_BANDS) if hi is not None),
+    len(AGE_BANDS) - 1,
+)
+
+_SUMMARY_KEY = "day, village, gender, age_band, class"
+_TOTALS_KEY = "village, gender, age_band, class"
+
+# i contatori ricalcolati da zero con una passata su registry
+_RECOMPUTE_SUMMARY = f"""
+    SELECT date(created_at) AS day, village, gender, {AGE_BAND_SQL} AS age_band, {CLASS_SQL} AS class,
+           COUNT(*) AS n
+    FROM registry GROUP BY 1, 2, 3, 4, 5
+"""
+
+
+# ---------- manutenzione dei contatori ----------
+
+def rebuild_counters(conn: sqlite3.Connection) -> None:
+    """Come rebuild_summary, dentro una transazione già aperta dal chiamante."""
+    conn.execute("DELETE FROM registry_summary")
+    conn.execute("DELETE FROM registry_totals")
+    conn.execute(f"INSERT INTO registry_summary ({_SUMMARY_KEY}, n) {_RECOMPUTE_SUMMARY}")
+    conn.execute(f"""
+        INSERT INTO registry_totals ({_TOTALS_KEY}, n)
+        SELECT {_TOTALS_KEY}, SUM(n) FROM registry_summary GROUP BY {_TOTALS_KEY}
+    """)
+
+
+def rebuild_summary() -> None:
+    """Ricalcola da zero i contatori su tutto registry (es. dopo un caricamento senza trigger)."""
+    conn = get_conn()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        rebuild_counters(conn)
+
+
+def check_summary() -> List[Tuple[str, tuple, int, int]]:
+    """
+    Confronta i contatori con un ricalcolo completo da registry, senza modificarli.
+    Ritorna le differenze come (tabella, chiave, atteso, trovato); lista vuota = tutto giusto.
+    """
+    diffs = []
+    conn = get_conn()
+    with conn:
+        # una sola transazione di lettura: contatori e registry visti nello stesso istante
+        conn.execute("BEGIN")
+        expected = {tuple(r[:5]): r[5] for r in conn.execute(_RECOMPUTE_SUMMARY)}
+        found = {tuple(r[:5]): r[5] for r in conn.execute(f"SELECT {_SUMMARY_KEY}, n FROM registry_summary")}
+        totals = {tuple(r[:4]): r[4] for r in conn.execute(f"SELECT {_TOTALS_KEY}, n FROM registry_totals")}
+
+    for key in sorted(expected.keys() | found.keys(), key=str):
+        if expected.get(key, 0) != found.get(key, 0):
+            diffs.append(("registry_summary", key, expected.get(key, 0), found.get(key, 0)))
+
+    expected_totals: Dict[tuple, int] = {}
+    for key, n in expected.items():
+        expected_totals[key[1:]] = expected_totals.get(key[1:], 0) + n
+    for key in sorted(expected_totals.keys() | totals.keys(), key=str):
+        if expected_totals.get(key, 0) != totals.get(key, 0):
+            diffs.append(("registry_totals", key, expected_totals.get(key, 0), totals.get(key, 0)))
+    return diffs
+
+
+# ---------- letture ----------
+
+def _source(village=None, gender=None, date_from=None, date_to=None) -> tuple:
+    """(tabella, where, parametri): i contatori per giorno servono solo se si filtra per data."""
+    clauses, params = [], []
+    if village:
+        clauses.append("village = ?")
+        params.append(village)
+    if gender:
+        clauses.append("gender = ?")
+        params.append(gender)
+    # date 'YYYY-MM-DD', estremi inclusi
+    if date_from:
+        clauses.append("day >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("day <= ?")
+        params.append(date_to)
+    table = "registry_summary" if date_from or date_to else "registry_totals"
+    return table, (" AND ".join(clauses) or "1"), params
+
+
+_PREVALENCE_COLUMNS = f"""
+    SUM(n) AS total,
+    SUM(CASE WHEN class <> {CLASS_UNKNOWN} THEN n ELSE 0 END) AS classified,
+    SUM(CASE WHEN class = {CLASS_MODERATE} THEN n ELSE 0 END) AS moderate,
+    SUM(CASE WHEN class = {CLASS_SEVERE} THEN n ELSE 0 END) AS severe
+"""
+
+
+def _with_rates(row: sqlite3.Row) -> Dict:
+    d = dict(row)
+    # prevalenza sui bambini classificabili, in percentuale
+    base = d["classified"] or 0
+    d["moderate_pct"] = round(100.0 * d["moderate"] / base, 1) if base else None
+    d["severe_pct"] = round(100.0 * d["severe"] / base, 1) if base else None
+    d["malnourished_pct"] = round(100.0 * (d["moderate"] + d["severe"]) / base, 1) if base else None
+    return d
+
+
+def counts_by_village_gender(**filters) -> List[Dict]:
+    """Numero di bambini per villaggio e sesso."""
+    table, where, params = _source(**filters)
+    with get_conn() as conn:
+        rows = conn.execute(f"""
+            SELECT village, gender, SUM(n) AS total FROM {table}
+            WHERE {where} GROUP BY village, gender ORDER BY village, gender
+        """, params).fetchall()
+    return [dict(r) for r in rows]
+
+
+def prevalence(by: tuple = ("village",), **filters) -> List[Dict]:
+    """
+    Prevalenza della malnutrizione moderata e severa, raggruppata per le colonne `by`
+    (tra village, gender; () = totale). Ogni riga ha total, classified, moderate,
+    severe e le percentuali *_pct calcolate sui classificabili.
+    """
+    for col in by:
+        if col not in ("village", "gender"):
+            raise ValueError(f"Raggruppamento non valido: {col}")
+    table, where, params = _source(**filters)
+    group = ", ".join(by)
+    q = f"SELECT {group + ',' if group else ''} {_PREVALENCE_COLUMNS} FROM {table} WHERE {where}"
+    if group:
+        q += f" GROUP BY {group} ORDER BY {group}"
+    with get_conn() as conn:
+        rows = conn.execute(q, params).fetchall()
+    return [_with_rates(r) for r in rows if r["total"]]
+
+
+def by_age_band(**filters) -> List[Dict]:
+    """Conteggi e prevalenza per fascia d'età (AGE_BANDS), fasce vuote comprese."""
+    table, where, params = _source(**filters)
+    with get_conn() as conn:
+        rows = {
+            r["age_band"]: r for r in conn.execute(f"""
+                SELECT age_band, {_PREVALENCE_COLUMNS} FROM {table}
+                WHERE {where} GROUP BY age_band
+            """, params)
+        }
+    out = []
+    for i, (label, _, _) in enumerate(AGE_BANDS):
+        if i in rows:
+            d = _with_rates(rows[i])
+        else:
+            d = {"age_band": i, "total": 0, "classified": 0, "moderate": 0, "severe": 0,
+                 "moderate_pct": None, "severe_pct": None, "malnourished_pct": None}
+        d["label"] = label
+        out.append(d)
+    return out
+
+
+def daily_intake(**filters) -> List[Dict]:
+    """Compilazioni per giorno (solo i giorni con almeno una compilazione), dal più recente."""
+    _, where, params = _source(**filters)
+    with get_conn() as conn:
+        rows = conn.execute(f"""
+            SELECT day, SUM(n) AS total,
+                   SUM(CASE WHEN class IN ({CLASS_MODERATE}, {CLASS_SEVERE}) THEN n ELSE 0 END) AS malnourished
+            FROM registry_summary WHERE {where}
+            GROUP BY day ORDER BY day DESC
+        """, params).fetchall()
+    return [dict(r) for r in rows]
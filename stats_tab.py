@@ -0,0 +1,127 @@
+"""
+Tab "Statistiche": conteggi e prevalenza della malnutrizione per villaggio, sesso,
+fascia d'età e giorno, letti dai contatori di stats.py.
+"""
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QComboBox, QPushButton,
+    QMessageBox, QTableWidget, QTableWidgetItem, QAbstractItemView, QHeaderView
+)
+
+from form_tab import VILLAGGI, SESSI
+import stats
+
+PREVALENCE_HEADERS = ["Bambini", "Classificabili", "Moderata", "Severa", "% moderata", "% severa", "% totale"]
+
+
+def _pct(v) -> str:
+    return "-" if v is None else f"{v:.1f}%"
+
+
+def _prevalence_cells(r: dict) -> list:
+    return [
+        r["total"], r["classified"], r["moderate"], r["severe"],
+        _pct(r["moderate_pct"]), _pct(r["severe_pct"]), _pct(r["malnourished_pct"]),
+    ]
+
+
+class StatsTab(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._build()
+
+    def _build(self):
+        lay = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.village_filter = QComboBox()
+        self.village_filter.addItems(["Tutti i villaggi"] + VILLAGGI[1:])
+        self.gender_filter = QComboBox()
+        self.gender_filter.addItems(["Tutti i sessi"] + SESSI[1:])
+        self.refresh_btn = QPushButton("Aggiorna")
+        top.addWidget(self.village_filter)
+        top.addWidget(self.gender_filter)
+        top.addStretch(1)
+        top.addWidget(self.refresh_btn)
+        lay.addLayout(top)
+
+        self.lbl_total = QLabel("")
+        lay.addWidget(self.lbl_total)
+
+        grid = QGridLayout()
+        self.by_group = self._table(["Villaggio", "Sesso"] + PREVALENCE_HEADERS)
+        self.by_age = self._table(["Fascia d'età"] + PREVALENCE_HEADERS)
+        self.by_day = self._table(["Giorno", "Compilazioni", "Malnutriti"])
+        grid.addWidget(QLabel("<b>Per villaggio e sesso</b>"), 0, 0)
+        grid.addWidget(self.by_group, 1, 0)
+        grid.addWidget(QLabel("<b>Per fascia d'età</b>"), 2, 0)
+        grid.addWidget(self.by_age, 3, 0)
+        grid.addWidget(QLabel("<b>Compilazioni per giorno</b>"), 0, 1)
+        grid.addWidget(self.by_day, 1, 1, 3, 1)
+        grid.setColumnStretch(0, 3)
+        grid.setColumnStretch(1, 1)
+        lay.addLayout(grid, 1)
+
+        lay.addWidget(QLabel(
+            "Moderata: WHZ < -2; severa: WHZ < -3 oppure MUAC ≤ 11.5 cm oltre i 6 mesi. "
+            "Percentuali sui bambini classificabili."
+        ))
+
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.village_filter.currentIndexChanged.connect(self.refresh)
+        self.gender_filter.currentIndexChanged.connect(self.refresh)
+
+    def _table(self, headers) -> QTableWidget:
+        t = QTableWidget(0, len(headers))
+        t.setHorizontalHeaderLabels(headers)
+        t.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        t.setSelectionMode(QAbstractItemView.NoSelection)
+        t.verticalHeader().setVisible(False)
+        t.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        return t
+
+    def _set_rows(self, table: QTableWidget, rows):
+        table.setRowCount(len(rows))
+        for i, cells in enumerate(rows):
+            for j, value in enumerate(cells):
+                item = QTableWidgetItem(str(value))
+                if not isinstance(value, str) or value.endswith("%"):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(i, j, item)
+
+    def _filters(self) -> dict:
+        filters = {}
+        if self.village_filter.currentIndex() > 0:
+            filters["village"] = self.village_filter.currentText()
+        if self.gender_filter.currentIndex() > 0:
+            filters["gender"] = self.gender_filter.currentText()
+        return filters
+
+    def showEvent(self, event):
+        # i contatori sono sempre aggiornati: basta rileggerli quando il tab torna visibile
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        filters = self._filters()
+        try:
+            total = stats.prevalence((), **filters)
+            groups = stats.prevalence(("village", "gender"), **filters)
+            ages = stats.by_age_band(**filters)
+            days = stats.daily_intake(**filters)
+        except Exception as e:
+            QMessageBox.critical(self, "Errore statistiche", str(e))
+            return
+
+        if total:
+            t = total[0]
+            self.lbl_total.setText(
+                f"<b>Totale:</b> {t['total']} bambini — moderata {_pct(t['moderate_pct'])}, "
+                f"severa {_pct(t['severe_pct'])}"
+            )
+        else:
+            self.lbl_total.setText("<b>Totale:</b> nessun dato")
+
+        self._set_rows(self.by_group, [[r["village"], r["gender"]] + _prevalence_cells(r) for r in groups])
+        self._set_rows(self.by_age, [[r["label"]] + _prevalence_cells(r) for r in ages])
+        self._set_rows(self.by_day, [[r["day"], r["total"], r["malnourished"]] for r in days])
@@ -0,0 +1,294 @@
+"""
+Dati sintetici per benchmark e prove di carico.
+
+Le righe rispettano i vincoli CHECK di registry (villaggi, sessi, risposte, 0/1)
+e hanno altezze dentro le tabelle LMS, così il WHZ è sempre calcolabile.
+
+- synthetic_rows(): una riga alla volta, Python puro
+- iter_synthetic_batches(): blocchi di righe, vettorizzati con NumPy se c'è
+- generate_db(): scrive milioni di righe direttamente in un file SQLite
+  (python cli.py generate grande.sqlite3 1000000)
+"""
+import random
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional
+
+import db
+import stats
+from db import REGISTRY_COLUMNS
+from whz import AGE_0_2_MAX, HEIGHT_STEP, SEX_KEYS, compute_whz, compute_whz_batch, lms_values
+
+VILLAGES = ("Andavadoaka", "Befandefa")
+GENDERS = tuple(SEX_KEYS)
+ANSWERS = ("Sì", "No", "Non so")
+
+MAX_AGE = 59   # mesi: bambini sotto i 5 anni
+# range coperti dalle tabelle LMS (cm), con un po' di margine dai bordi
+HEIGHT_RANGE = {"0_2": (46.0, 109.0), "2_5": (66.0, 119.0)}
+# le compilazioni si fanno di giorno: ore 7-17
+WORK_START = 7 * 3600
+WORK_SECONDS = 10 * 3600
+
+BATCH_SIZE = 50_000
+
+_SQL = "INSERT INTO registry ({}) VALUES ({})".format(
+    ", ".join(REGISTRY_COLUMNS), ", ".join("?" * len(REGISTRY_COLUMNS))
+)
+
+
+def _median_height(age: int) -> float:
+    # crescita approssimativa: ~50 cm alla nascita, ~87 a 2 anni, ~110 a 5 anni
+    if age <= 12:
+        return 50.0 + 2.1 * age
+    if age <= 24:
+        return 75.0 + 1.0 * (age - 12)
+    return 87.0 + 0.65 * (age - 24)
+
+
+def _first_day(end: Optional[datetime], days: int) -> datetime:
+    end = end or datetime.now()
+    return datetime(end.year, end.month, end.day) - timedelta(days=days - 1)
+
+
+def synthetic_rows(
+    n: int,
+    *,
+    seed: int = 0,
+    start: int = 0,
+    end: Optional[datetime] = None,
+    days: int = 365,
+) -> Iterator[tuple]:
+    """
+    Genera `n` righe di registry (tuple nell'ordine di REGISTRY_COLUMNS).
+    I taratassi sono SYN00000000, SYN00000001, ... a partire da `start`;
+    created_at cade negli ultimi `days` giorni fino a `end`, in orario di lavoro.
+    """
+    rnd = random.Random(seed)
+    first_day = _first_day(end, days)
+
+    for i in range(start, start + n):
+        gender = rnd.choice(GENDERS)
+        age = rnd.randint(0, MAX_AGE)
+        lo, hi = HEIGHT_RANGE["0_2" if age <= AGE_0_2_MAX else "2_5"]
+        height = round(min(max(rnd.gauss(_median_height(age), 4.0), lo), hi), 1)
+
+        # peso ricavato dallo z-score (formula LMS inversa): popolazione un po' sotto la media
+        l, m, s = lms_values(height, gender, age)
+        z = rnd.gauss(-0.6, 1.1)
+        weight = round(m * max(1.0 + l * s * z, 0.05) ** (1.0 / l), 1)
+        whz = round(compute_whz(weight, l, m, s), 1)
+        muac = round(min(max(rnd.gauss(13.5 + 0.8 * z, 0.8), 8.0), 18.0), 1)
+
+        created = first_day + timedelta(
+            days=rnd.randrange(days), seconds=WORK_START + rnd.randrange(WORK_SECONDS)
+        )
+        yield (
+            f"SYN{i:08d}",
+            rnd.choice(VILLAGES),
+            1,
+            rnd.randint(0, 1),
+            age,
+            max(age + rnd.randint(-2, 2), 0),
+            gender,
+            muac,
+            weight,
+            height,
+            whz,
+            *(rnd.choice(ANSWERS) for _ in range(6)),
+            created.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+def _numpy_batch(np, rng, start: int, k: int, first_day, days: int) -> List[tuple]:
+    """Come synthetic_rows, ma una colonna alla volta con NumPy."""
+    from lms_tables import TABLES
+
+    gender = rng.integers(0, len(GENDERS), k)
+    age = rng.integers(0, MAX_AGE + 1, k)
+    young = age <= AGE_0_2_MAX
+
+    median = np.where(
+        age <= 12, 50.0 + 2.1 * age,
+        np.where(young, 75.0 + 1.0 * (age - 12), 87.0 + 0.65 * (age - 24)),
+    )
+    height = rng.normal(median, 4.0)
+    height = np.where(
+        young,
+        np.clip(height, *HEIGHT_RANGE["0_2"]),
+        np.clip(height, *HEIGHT_RANGE["2_5"]),
+    ).round(1)
+
+    # L, M, S del nodo LMS più vicino (stesso arrotondamento di whz.lms_values)
+    L = np.empty(k)
+    M = np.empty(k)
+    S = np.empty(k)
+    for g, sex_key in enumerate(SEX_KEYS.values()):
+        for band, sel_age in (("0_2", young), ("2_5", ~young)):
+            sel = (gender == g) & sel_age
+            table = TABLES[sex_key, band]
+            idx = np.floor((height[sel] - table.min_height) / HEIGHT_STEP + 0.5 + 1e-9).astype(np.int64)
+            L[sel] = table.L
+            M[sel] = np.frombuffer(table.M)[idx]
+            S[sel] = np.frombuffer(table.S)[idx]
+
+    z = rng.normal(-0.6, 1.1, k)
+    weight = (M * np.maximum(1.0 + L * S * z, 0.05) ** (1.0 / L)).round(1)
+    sexes = np.array(GENDERS, dtype=object)[gender]
+    whz = compute_whz_batch(weight, height, sexes, age, decimals=1, use_numpy=True)
+    muac = np.clip(rng.normal(13.5 + 0.8 * z, 0.8), 8.0, 18.0).round(1)
+
+    offsets = rng.integers(0, days, k) * 86400 + WORK_START + rng.integers(0, WORK_SECONDS, k)
+    created = (np.datetime64(first_day, "s") + offsets.astype("timedelta64[s]")).astype(str)
+
+    answers = np.array(ANSWERS, dtype=object)
+    columns = [
+        [f"SYN{i:08d}" for i in range(start, start + k)],
+        np.array(VILLAGES, dtype=object)[rng.integers(0, len(VILLAGES), k)].tolist(),
+        [1] * k,
+        rng.integers(0, 2, k).tolist(),
+        age.tolist(),
+        np.maximum(age + rng.integers(-2, 3, k), 0).tolist(),
+        sexes.tolist(),
+        muac.tolist(),
+        weight.tolist(),
+        height.tolist(),
+        whz.tolist(),
+        *(answers[rng.integers(0, len(ANSWERS), k)].tolist() for _ in range(6)),
+        [c.replace("T", " ") for c in created],
+    ]
+    return list(zip(*columns))
+
+
+def iter_synthetic_batches(
+    n: int,
+    *,
+    seed: int = 0,
+    start: int = 0,
+    end: Optional[datetime] = None,
+    days: int = 365,
+    batch_size: int = BATCH_SIZE,
+    use_numpy: Optional[bool] = None,
+) -> Iterator[List[tuple]]:
+    """
+    Righe sintetiche a blocchi di `batch_size` (liste di tuple, come synthetic_rows).
+    Con NumPy (use_numpy=None: se installato) le colonne si generano vettorizzate;
+    gli stessi parametri danno le stesse righe, ma diverse tra le due strade.
+    """
+    np = None
+    if use_numpy is not False:
+        try:
+            import numpy as np
+        except ImportError:
+            if use_numpy:
+                raise
+
+    if np is None:
+        rows = synthetic_rows(n, seed=seed, start=start, end=end, days=days)
+        while True:
+            batch = [row for _, row in zip(range(batch_size), rows)]
+            if not batch:
+                return
+            yield batch
+
+    rng = np.random.default_rng(seed)
+    first_day = _first_day(end, days)
+    for offset in range(0, n, batch_size):
+        yield _numpy_batch(np, rng, start + offset, min(batch_size, n - offset), first_day, days)
+
+
+def insert_synthetic(conn: sqlite3.Connection, n: int, *, batch_size: int = 5000, **kwargs) -> int:
+    """Inserisce `n` righe sintetiche in registry, una transazione ogni `batch_size` righe."""
+    done = 0
+    for batch in iter_synthetic_batches(n, batch_size=batch_size, **kwargs):
+        with conn:
+            conn.executemany(_SQL, batch)
+        done += len(batch)
+    db.invalidate_records()
+    return done
+
+
+@contextmanager
+def _bulk_load(conn: sqlite3.Connection, *, rebuild: bool):
+    """
+    Una sola transazione per tutto il caricamento, con vincoli CHECK sospesi
+    (costano più dell'insert stesso): le righe sintetiche li rispettano per
+    costruzione, generate_db(check=True) li riverifica.
+
+    Con rebuild=True si tolgono anche indici secondari e trigger di registry:
+    alla fine vengono ricreati e si ricostruisce ciò che i trigger avrebbero scritto
+    (classe di malnutrizione, indice full-text, registro modifiche, contatori delle
+    statistiche). Conviene solo se le righe nuove sono almeno quante quelle già presenti.
+    """
+    saved = []
+    if rebuild:
+        saved = conn.execute("""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE tbl_name = 'registry' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+        """).fetchall()
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA ignore_check_constraints = ON")
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            first_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM registry").fetchone()[0]
+            for type_, name, _ in saved:
+                conn.execute(f"DROP {type_.upper()} {name}")
+
+            yield
+
+            if rebuild:
+                # prima degli indici: così l'UPDATE non li deve aggiornare
+                conn.execute(
+                    f"UPDATE registry SET malnutrition = NULLIF({stats.CLASS_SQL}, {stats.CLASS_UNKNOWN}) "
+                    "WHERE rowid >= ?", (first_rowid,)
+                )
+                for _, _, sql in saved:
+                    conn.execute(sql)
+                if db.fts_available(conn):
+                    conn.execute("INSERT INTO registry_fts (registry_fts) VALUES ('rebuild')")
+                conn.execute("""
+                    INSERT INTO registry_changes (op, taratassi)
+                    SELECT 'I', taratassi FROM registry WHERE rowid >= ? ORDER BY created_at, taratassi
+                """, (first_rowid,))
+                stats.rebuild_counters(conn)
+    finally:
+        conn.execute("PRAGMA ignore_check_constraints = OFF")
+        conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def generate_db(
+    path,
+    n: int,
+    *,
+    batch_size: int = BATCH_SIZE,
+    check: bool = False,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **kwargs,
+) -> int:
+    """
+    Crea (o aggiorna allo schema corrente) il DB `path` e ci aggiunge `n` righe sintetiche.
+    Pensata per DB da milioni di righe: vedi _bulk_load. Con check=True a fine
+    caricamento si verificano i vincoli di registry (PRAGMA quick_check).
+    """
+    db.use_db(path)
+    db.init_db()
+    conn = db.get_conn()
+    existing = conn.execute("SELECT COUNT(*) FROM registry").fetchone()[0]
+    done = 0
+    with _bulk_load(conn, rebuild=n >= existing):
+        for batch in iter_synthetic_batches(n, batch_size=batch_size, **kwargs):
+            conn.executemany(_SQL, batch)
+            done += len(batch)
+            if progress:
+                progress(done, n)
+    db.invalidate_records()
+    # il WAL ora è grande quanto i dati: lo si riversa nel DB e lo si tronca
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    if check:
+        problems = [r[0] for r in conn.execute("PRAGMA quick_check(registry)") if r[0] != "ok"]
+        if problems:
+            raise RuntimeError("Righe sintetiche non valide: " + "; ".join(problems[:5]))
+    return done
@@ -0,0 +1,26 @@
+"""init_db su file nuovi o lasciati a metà da versioni precedenti."""
+import sqlite3
+
+import db
+from migrations import CURRENT_SCHEMA_VERSION
+
+
+def test_init_db_with_empty_schema_version(tmp_path):
+    # il vecchio init_db su un file nuovo migrava prima di creare registry:
+    # restava solo schema_version, vuota, senza la tabella base
+    path = tmp_path / "old.sqlite3"
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "CREATE TABLE schema_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+        )
+    conn.close()
+
+    db.use_db(path)
+    try:
+        db.init_db()
+        assert db.count_registry() == 0
+        conn = db.get_conn()
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == CURRENT_SCHEMA_VERSION
+    finally:
+        db.close_all()
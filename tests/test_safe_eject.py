@@ -0,0 +1,68 @@
+"""Salvataggi dal thread di scrittura prima e dopo db.safe_eject()."""
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtCore = pytest.importorskip("PySide6.QtCore")
+
+import db
+import write_queue
+
+RECORD = dict(
+    village="Befandefa", consent=1, witnessed=1, declared_age=24, age_estimation=24,
+    gender="Maschio", muac=12.0, weight=10.0, height=80.0, whz=-1.0,
+    q1="Sì", q2="No", q3="Sì", q4="No", q5="Sì", q6="No",
+)
+
+
+class Results(QtCore.QObject):
+    """Raccoglie gli esiti nel thread principale (come farebbe un tab)."""
+    def __init__(self):
+        super().__init__()
+        self.saved = {}
+        self.failed = {}
+
+    def on_saved(self, request_id, op, taratassi):
+        self.saved[request_id] = taratassi
+
+    def on_failed(self, request_id, op, taratassi, error):
+        self.failed[request_id] = error
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    db.use_db(tmp_path / "q.sqlite3")
+    db.init_db()
+    yield app
+    write_queue.shutdown()
+    db.close_all()
+
+
+def _wait(app, results, request_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while request_id not in results.saved and request_id not in results.failed:
+        assert time.monotonic() < deadline, "nessuna risposta dal thread di scrittura"
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def test_writer_saves_after_safe_eject(app):
+    results = Results()
+    w = write_queue.writer()
+    w.saved.connect(results.on_saved)
+    w.failed.connect(results.on_failed)
+
+    first = w.submit("insert", "EJ1", dict(RECORD, taratassi="EJ1"))
+    _wait(app, results, first)
+
+    db.safe_eject()
+
+    second = w.submit("insert", "EJ2", dict(RECORD, taratassi="EJ2"))
+    _wait(app, results, second)
+    assert results.failed == {}
+    assert results.saved == {first: "EJ1", second: "EJ2"}
+    # anche la connessione del thread principale si riapre da sola
+    assert db.count_registry(taratassi="EJ") == 2
@@ -0,0 +1,204 @@
+"""
+Calcolo dell'indice WHZ (weight-for-height z-score, standard OMS) senza dipendenze GUI.
+
+- whz_for(): un bambino alla volta (usato dal form)
+- compute_whz_batch(): interi dataset in un colpo solo, con NumPy se installato
+  e ripiego in Python puro altrimenti
+- classify(): classe di malnutrizione da WHZ, MUAC ed età
+"""
+import math
+from typing import Optional, Sequence, Tuple
+
+HEIGHT_STEP = 0.5     # le tabelle LMS hanno un nodo ogni 0.5 cm
+AGE_0_2_MAX = 24      # mesi: fino a 24 si usano le tabelle 0-2 anni
+
+# soglie di RegistryForm._update_whz_status
+WHZ_MODERATE = -2.0   # WHZ < -2: malnutrizione moderata
+WHZ_SEVERE = -3.0     # WHZ < -3: malnutrizione severa
+MUAC_SEVERE = 11.5    # MUAC <= 11.5 cm (oltre i 6 mesi): severa, qualunque sia il WHZ
+MUAC_MIN_AGE = 6      # mesi
+
+# codici della classe di malnutrizione (None = non calcolabile)
+CLASS_NONE = 0
+CLASS_MODERATE = 1
+CLASS_SEVERE = 2
+CLASS_LABELS = {
+    CLASS_NONE: "Non Malnutrito",
+    CLASS_MODERATE: "Malnutrizione Moderata",
+    CLASS_SEVERE: "Malnutrizione Severa",
+    None: "Non calcolabile",
+}
+
+
+def compute_whz(y, L, M, S):
+    if y <= 0 or M <= 0 or S <= 0:
+        raise ValueError("weight (y), M e S devono essere > 0")
+    if abs(L) < 1e-12:
+        return math.log(y / M) / S
+    return ((y / M) ** L - 1.0) / (L * S)
+
+
+SEX_KEYS = {"Maschio": "boys", "Femmina": "girls"}
+
+
+def _tables():
+    # caricate solo al primo calcolo: chi non calcola WHZ non paga l'import
+    from lms_tables import TABLES
+    return TABLES
+
+
+def age_key(age: int) -> str:
+    return "0_2" if age <= AGE_0_2_MAX else "2_5"
+
+
+def quantize_height(height: float) -> float:
+    """Arrotonda l'altezza al nodo LMS più vicino (multipli di 0.5 cm, metà per eccesso)."""
+    return math.floor(height / HEIGHT_STEP + 0.5 + 1e-9) * HEIGHT_STEP
+
+
+def lms_values(
+    height: float, sex: str, age: int, *, interpolate: bool = False
+) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+    """
+    (L, M, S) per altezza/sesso/età in mesi, oppure (None, None, None) se fuori tabella.
+    Di default usa il nodo da 0.5 cm più vicino; con interpolate=True interpola
+    linearmente M e S tra i due nodi adiacenti.
+    """
+    sex_key = SEX_KEYS.get(sex)
+    if not height or not math.isfinite(height) or sex_key is None:
+        return None, None, None
+    table = _tables()[sex_key, age_key(age)]
+
+    pos = height / HEIGHT_STEP - table.min_height / HEIGHT_STEP
+    n = len(table.M)
+    if not interpolate:
+        i = math.floor(pos + 0.5 + 1e-9)
+        if i < 0 or i >= n:
+            return None, None, None
+        return table.L, table.M[i], table.S[i]
+
+    if pos < -1e-9 or pos > n - 1 + 1e-9:
+        return None, None, None
+    i = min(max(math.floor(pos), 0), n - 2)
+    t = pos - i
+    m = table.M[i] + (table.M[i + 1] - table.M[i]) * t
+    s = table.S[i] + (table.S[i + 1] - table.S[i]) * t
+    return table.L, m, s
+
+
+def whz_for(weight: float, height: float, sex: str, age: int, *, interpolate: bool = False) -> Optional[float]:
+    """WHZ di un singolo bambino, None se non calcolabile (peso nullo, altezza fuori tabella...)."""
+    l, m, s = lms_values(height, sex, age, interpolate=interpolate)
+    if l is None or not weight or weight <= 0:
+        return None
+    return compute_whz(weight, l, m, s)
+
+
+def classify(whz: Optional[float], muac: Optional[float], age: int) -> Optional[int]:
+    """
+    Classe di malnutrizione (CLASS_*), None se manca il WHZ e il MUAC non decide.
+    MUAC = 0 vuol dire "non misurato" (vedi insert_registry) e non fa scattare la soglia.
+    """
+    if muac and muac <= MUAC_SEVERE and age > MUAC_MIN_AGE:
+        return CLASS_SEVERE
+    if whz is None:
+        return None
+    if whz >= WHZ_MODERATE:
+        return CLASS_NONE
+    if whz >= WHZ_SEVERE:
+        return CLASS_MODERATE
+    return CLASS_SEVERE
+
+
+# ---------- calcolo batch ----------
+
+def _batch_numpy(np, weights, heights, sexes, ages, interpolate):
+    w = np.asarray(weights, dtype=float)
+    h = np.asarray(heights, dtype=float)
+    a = np.asarray(ages, dtype=float)
+    sx = np.asarray(sexes, dtype=object)
+
+    out = np.full(w.shape, np.nan)
+    for sex_label, sex_key in SEX_KEYS.items():
+        is_sex = sx == sex_label
+        for age_k, in_band in (("0_2", a <= AGE_0_2_MAX), ("2_5", a > AGE_0_2_MAX)):
+            table = _tables()[sex_key, age_k]
+            M = np.frombuffer(table.M)
+            S = np.frombuffer(table.S)
+            n = len(M)
+            pos = h / HEIGHT_STEP - table.min_height / HEIGHT_STEP
+            if interpolate:
+                in_range = (pos >= -1e-9) & (pos <= n - 1 + 1e-9)
+            else:
+                # altezze NaN/inf fuori prima del cast a intero (-1 = nessun nodo)
+                finite = np.isfinite(pos)
+                idx = np.full(pos.shape, -1, dtype=np.int64)
+                idx[finite] = np.floor(pos[finite] + 0.5 + 1e-9).astype(np.int64)
+                in_range = (idx >= 0) & (idx < n)
+            sel = is_sex & in_band & in_range & (w > 0)
+            if not sel.any():
+                continue
+
+            if interpolate:
+                p = pos[sel]
+                i = np.clip(np.floor(p).astype(np.int64), 0, n - 2)
+                t = p - i
+                m = M[i] + (M[i + 1] - M[i]) * t
+                s = S[i] + (S[i + 1] - S[i]) * t
+            else:
+                i = idx[sel]
+                m = M[i]
+                s = S[i]
+            l = table.L
+            # stesse formule di compute_whz, compreso il caso L = 0
+            if abs(l) < 1e-12:
+                out[sel] = np.log(w[sel] / m) / s
+            else:
+                out[sel] = ((w[sel] / m) ** l - 1.0) / (l * s)
+    return out
+
+
+def _batch_python(weights, heights, sexes, ages, interpolate):
+    out = []
+    for w, h, sex, age in zip(weights, heights, sexes, ages):
+        z = None
+        if h and w:
+            z = whz_for(float(w), float(h), sex, int(age), interpolate=interpolate)
+        out.append(math.nan if z is None else z)
+    return out
+
+
+def compute_whz_batch(
+    weights: Sequence[float],
+    heights: Sequence[float],
+    sexes: Sequence[str],
+    ages: Sequence[int],
+    *,
+    decimals: Optional[int] = None,
+    interpolate: bool = False,
+    use_numpy: Optional[bool] = None,
+):
+    """
+    WHZ per interi dataset: sequenze parallele di peso (kg), altezza (cm),
+    sesso ('Maschio'/'Femmina') ed età dichiarata in mesi.
+
+    Ritorna una sequenza di float (ndarray se si usa NumPy) con NaN dove il WHZ
+    non è calcolabile. `decimals` arrotonda come il form (1 decimale).
+    Con use_numpy=None si usa NumPy se è installato.
+    """
+    np = None
+    if use_numpy is not False:
+        try:
+            import numpy as np
+        except ImportError:
+            if use_numpy:
+                raise
+
+    if np is not None:
+        out = _batch_numpy(np, weights, heights, sexes, ages, interpolate)
+        return np.round(out, decimals) if decimals is not None else out
+
+    out = _batch_python(weights, heights, sexes, ages, interpolate)
+    if decimals is not None:
+        out = [v if math.isnan(v) else round(v, decimals) for v in out]
+    return out
@@ -0,0 +1,115 @@
+"""
+Salvataggi dei form in un thread dedicato, con group commit.
+
+FormTab ed EditDialog non scrivono più sul thread della GUI: accodano la
+compilazione e tornano subito. Il thread di scrittura ha la sua connessione e
+raccoglie le richieste che arrivano entro GROUP_COMMIT_WINDOW_MS dalla prima
+(al massimo GROUP_COMMIT_MAX), poi le salva con un solo commit (db.apply_writes).
+L'esito di ogni richiesta arriva con i segnali `saved` / `failed`, con l'id
+restituito da submit(): un taratassi duplicato fa fallire solo la sua richiesta.
+"""
+import itertools
+import queue
+import time
+from typing import Optional
+
+from PySide6.QtCore import QObject, QThread, Signal, Slot
+
+from db import apply_writes, close_conn
+
+GROUP_COMMIT_WINDOW_MS = 50   # attesa massima aggiunta a un salvataggio
+GROUP_COMMIT_MAX = 32         # richieste per commit
+
+
+class WriteWorker(QObject):
+    saved = Signal(int, str, str)            # id richiesta, operazione, taratassi
+    failed = Signal(int, str, str, object)   # id richiesta, operazione, taratassi, eccezione
+
+    def __init__(self, window_ms: int = GROUP_COMMIT_WINDOW_MS, max_group: int = GROUP_COMMIT_MAX):
+        super().__init__()
+        self.window = window_ms / 1000
+        self.max_group = max_group
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+
+    def submit(self, op: str, taratassi: str, data: Optional[dict] = None) -> int:
+        """Accoda una scrittura (vedi db.apply_writes) e ne ritorna l'id."""
+        request_id = next(self._ids)
+        self._queue.put((request_id, op, taratassi, data))
+        return request_id
+
+    def stop(self):
+        # le richieste già in coda vengono salvate prima di uscire
+        self._queue.put(None)
+
+    def _next_group(self) -> tuple:
+        """(richieste, stop): blocca fino alla prima richiesta, poi raccoglie quelle della finestra."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        group = [first]
+        deadline = time.monotonic() + self.window
+        while len(group) < self.max_group:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    @Slot()
+    def run(self):
+        stop = False
+        try:
+            while not stop:
+                group, stop = self._next_group()
+                if group:
+                    self._commit(group)
+        finally:
+            close_conn()
+
+    def _commit(self, group):
+        try:
+            errors = apply_writes([item[1:] for item in group])
+        except Exception as e:
+            # commit fallito (disco pieno, chiavetta staccata, dati non validi...):
+            # di questo gruppo non è salvato nulla, il thread resta vivo per i prossimi
+            errors = [e] * len(group)
+        for (request_id, op, taratassi, _), error in zip(group, errors):
+            if error is None:
+                self.saved.emit(request_id, op, taratassi)
+            else:
+                self.failed.emit(request_id, op, taratassi, error)
+
+
+_thread: Optional[QThread] = None
+_worker: Optional[WriteWorker] = None
+
+
+def writer() -> WriteWorker:
+    """Il thread di scrittura dell'app, avviato alla prima richiesta (dal thread della GUI)."""
+    global _thread, _worker
+    if _worker is None:
+        _thread = QThread()
+        _worker = WriteWorker()
+        _worker.moveToThread(_thread)
+        _thread.started.connect(_worker.run)
+        _thread.start()
+    return _worker
+
+
+def shutdown() -> None:
+    """Salva ciò che è ancora in coda e ferma il thread (alla chiusura dell'app)."""
+    global _thread, _worker
+    if _worker is None:
+        return
+    _worker.stop()
+    _thread.quit()
+    _thread.wait()
+    _thread = None
+    _worker = None